@@ -1,33 +1,36 @@
-from google import genai
+from llm_backends import GEMINI_MODEL_ID, GeminiBackend
+from prompt_context import build_student_context
+
+# Bump whenever the roadmap prompt below changes so cached roadmaps are not reused
+ROADMAP_PROMPT_VERSION = 2
 
 class CareerAI:
-    def __init__(self, api_key):
-        # Initializing the new 2026-standard Client
-        self.client = genai.Client(api_key=api_key)
-        self.model_id = "gemini-2.0-flash" # Optimized for speed and logic
+    def __init__(self, api_key, response_cache=None, backend=None):
+        # Any llm_backends.LLMBackend; Gemini 2.0 Flash (optimized for speed and logic) by default
+        self.backend = backend or GeminiBackend(api_key, GEMINI_MODEL_ID)
+        self.model_id = self.backend.model_id
+        # Optional llm_cache.LLMResponseCache shared with EvidenceInterviewer
+        self.response_cache = response_cache
 
     def get_career_roadmap(self, academics_df, activities_df):
         """Analyzes data to predict the student's career path."""
-        context = f"""
-        Academic Performance:
-        {academics_df.to_string()}
-        
-        Extracurricular Activities:
-        {activities_df.to_string()}
-        """
-        
+        if self.response_cache is None:
+            return self._generate_roadmap(academics_df, activities_df)
+        return self.response_cache.get_or_create(
+            self.model_id, ROADMAP_PROMPT_VERSION, "career_roadmap", academics_df, activities_df,
+            lambda: self._generate_roadmap(academics_df, activities_df))
+
+    def _generate_roadmap(self, academics_df, activities_df):
+        context = build_student_context(academics_df, activities_df)
+
         prompt = f"""
         Analyze the following student data and provide a Career Roadmap:
         {context}
-        
+
         Identify:
         1. Primary Strength (e.g., Technical, Creative, Leadership).
         2. Three recommended career paths.
         3. A 'Skill Gap' analysis (what they should learn next).
         """
-        
-        response = self.client.models.generate_content(
-            model=self.model_id,
-            contents=prompt
-        )
-        return response.text
\ No newline at end of file
+
+        return self.backend.complete([{"role": "user", "content": prompt}])
@@ -1,18 +1,45 @@
-import groq
 import os
+from groq_pool import LLMUnavailableError
+from llm_backends import GROQ_MODEL_ID, GroqBackend
+from prompt_context import build_student_context
+
+MODEL_ID = GROQ_MODEL_ID
+FALLBACK_REPLY = "I've processed that detail. Please tell me a bit more so I can wrap this up."
+MENTOR_OFFLINE = "Mentor is currently offline. Please try again in a moment."
+# Bump whenever _roadmap_prompt changes so cached roadmaps from the old wording are not reused
+ROADMAP_PROMPT_VERSION = 2
+# Context for the per-student admin insight (three sections, see _roadmap_prompt)
+ADMIN_INSIGHT_CONTEXT = "ADMIN_MODE: FUTURE PERSPECTIVE | AREAS TO IMPROVE | HELP NEEDED"
 
 class EvidenceInterviewer:
-    def __init__(self, api_keys):
+    def __init__(self, api_keys, client=None, response_cache=None, backend=None):
         self.api_keys = api_keys
-        self.current_key_index = 0
-        self.client = groq.Groq(api_key=self.api_keys[self.current_key_index])
+        # Optional llm_cache.LLMResponseCache for roadmap / admin insight completions
+        self.response_cache = response_cache
+        # Any llm_backends.LLMBackend; by default Groq with one client per non-empty key,
+        # quota tracking and retries (see groq_pool). ``client`` injects a single stand-in
+        # client, ``backend`` a whole stand-in backend (see fake_llm)
+        self.backend = backend or GroqBackend(api_keys, MODEL_ID, clients=[client] if client else None)
+
+    def _stream_completion(self, messages, temperature):
+        """Yields completion text as it arrives. Raises LLMUnavailableError once every key has been tried."""
+        return self.backend.stream(messages, temperature)
+
+    def _complete_or(self, chunks, fallback):
+        try:
+            return "".join(chunks)
+        except LLMUnavailableError:
+            return fallback
 
-    def get_ai_response(self, user_input, history, counter):
+    @staticmethod
+    def _interview_messages(history, counter, memory=None):
         """
         counter 0-4: Investigative Journalist Mode
         counter 5: Final Summary Mode (No more questions)
+
+        ``memory`` (a conversation_memory.ConversationMemory) bounds what is sent.
         """
-        
+
         # Determine if we are at the finish line
         is_final_round = (counter >= 5)
 
@@ -39,46 +66,79 @@ class EvidenceInterviewer:
                             )
 
         messages = [{"role": "system", "content": system_content}]
-        
+
         # Add conversation history
-        for msg in history:
-            messages.append({"role": msg["role"], "content": msg["content"]})
+        if memory is not None:
+            messages.extend(memory.messages(history))
+        else:
+            messages.extend({"role": msg["role"], "content": msg["content"]} for msg in history)
 
-        try:
-            response = self.client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
-                messages=messages,
-                temperature=0.7 if not is_final_round else 0.3 # Lower temp for the final tag for accuracy
-            )
-            return response.choices[0].message.content
+        # Lower temp for the final tag for accuracy
+        return messages, (0.7 if not is_final_round else 0.3)
 
-        except Exception:
-            self.current_key_index = (self.current_key_index + 1) % len(self.api_keys)
-            self.client = groq.Groq(api_key=self.api_keys[self.current_key_index])
-            return "I've processed that detail. Please tell me a bit more so I can wrap this up."
+    def stream_ai_response(self, user_input, history, counter, memory=None):
+        """Journalist reply as a generator of text chunks (for st.write_stream)."""
+        messages, temperature = self._interview_messages(history, counter, memory)
+        yield from self._stream_completion(messages, temperature)
 
-    def get_career_roadmap(self, grades_df, activities_df, context):
+    def get_ai_response(self, user_input, history, counter, memory=None):
+        """Blocking variant of stream_ai_response; returns the whole reply (or a fallback if all keys fail)."""
+        return self._complete_or(self.stream_ai_response(user_input, history, counter, memory), FALLBACK_REPLY)
+
+    @staticmethod
+    def extract_save_data(text):
+        """Parses the 'SAVE_DATA: grade | title | skills | summary' tag from a full reply, or returns None."""
+        if "SAVE_DATA" not in text:
+            return None
+        data = text.split("SAVE_DATA", 1)[1].strip(": ").split("|")
+        if len(data) < 4:
+            return None
+        return {"title": data[1].strip(), "skills": data[2].strip(), "summary": data[3].strip()}
+
+    @staticmethod
+    def _roadmap_prompt(grades_df, activities_df, context):
         # Admin Insight & Career Mentor Logic
-        prompt = f"""
+        return f"""
         CONTEXT: {context}
-        GRADES: {grades_df.to_string()}
-        PORTFOLIO: {activities_df.to_string()}
-        
+        STUDENT PROFILE:
+{build_student_context(grades_df, activities_df)}
+
         If context contains 'ADMIN_MODE':
         Provide exactly three sections:
         🔭 FUTURE PERSPECTIVE: (Analyze career trajectory)
         🎯 AREAS TO IMPROVE: (Identify gaps)
         🆘 HELP NEEDED: (Specify teacher/parent support)
-        
+
         If context is a student question:
         Answer as a friendly Career Mentor. Be specific about job roles and skills.
         """
+
+    def stream_mentor_reply(self, grades_df, activities_df, history, memory):
+        """
+        Career Mentor chat turn as a generator of text chunks. ``history`` is the full chat
+        (ending with the student's question); ``memory`` decides how much of it is sent.
+        """
+        system = (
+            "You are a friendly Career Mentor for a high-school student. "
+            "Be specific about job roles and skills, and ground your advice in their profile.\n\n"
+            f"STUDENT PROFILE:\n{build_student_context(grades_df, activities_df)}"
+        )
+        messages = [{"role": "system", "content": system}] + memory.messages(history)
+        yield from self._stream_completion(messages, 0.6)
+
+    def fetch_career_roadmap(self, grades_df, activities_df, context):
+        """Like get_career_roadmap, but raises LLMUnavailableError instead of returning MENTOR_OFFLINE."""
+        prompt = self._roadmap_prompt(grades_df, activities_df, context)
+        # Blocking, so a router backend can hedge it (see llm_router)
+        generate = lambda: self.backend.complete([{"role": "user", "content": prompt}], 0.6)
+        if self.response_cache is None:
+            return generate()
+        return self.response_cache.get_or_create(self.backend.model_id, ROADMAP_PROMPT_VERSION, context,
+                                                 grades_df, activities_df, generate)
+
+    def get_career_roadmap(self, grades_df, activities_df, context):
         try:
-            response = self.client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.6
-            )
-            return response.choices[0].message.content
-        except:
-            return "Mentor is currently offline. Please try again in a moment."
\ No newline at end of file
+            return self.fetch_career_roadmap(grades_df, activities_df, context)
+        except LLMUnavailableError:
+            # Not cached: the next click should try the API again
+            return MENTOR_OFFLINE
@@ -2,14 +2,22 @@
 import streamlit as st
 import pandas as pd
 import os
-import bcrypt
-import sqlite3
 import io
 import plotly.express as px
+import plotly.graph_objects as go
 from datetime import datetime
-from database import DatabaseManager
+from database import ROSTER_PAGE_SIZE, DatabaseManager
 from ai_interviewer import EvidenceInterviewer
+from groq_pool import LLMUnavailableError
+from llm_backends import GeminiBackend, GroqBackend
+from llm_cache import LLMResponseCache
+from llm_router import LLMRouter
 from portfolio_manager import PortfolioManager
+from image_pipeline import best_image
+from insight_batch import InsightBatchJob
+from conversation_memory import ConversationMemory
+from grade_analytics import PASS_MARK, CohortAnalytics
+from performance_charts import student_history_chart
 
 # --- 1. SYSTEM CONFIGURATION ---
 st.set_page_config(
@@ -38,10 +46,126 @@ def init_system():
             conn.execute("ALTER TABLE activities ADD COLUMN grade_section TEXT")
         conn.commit()
             
-    return db_mgr, EvidenceInterviewer(GROQ_KEYS), PortfolioManager()
+    # With a Gemini key configured, requests are routed to whichever provider is currently
+    # faster and blocking ones are hedged across both (see llm_router)
+    backend = None
+    if os.environ.get("GEMINI_API_KEY"):
+        backend = LLMRouter([GroqBackend(GROQ_KEYS), GeminiBackend(os.environ["GEMINI_API_KEY"])])
+    ai = EvidenceInterviewer(GROQ_KEYS, response_cache=LLMResponseCache("llm_cache.db"), backend=backend)
+    return db_mgr, ai, PortfolioManager(db=db_mgr)
 
 db, ai_core, pf_manager = init_system()
 
+@st.cache_resource
+def cohort_analytics(_db):
+    # Keeps the last cohort report across reruns; rebuilt on request after grades change
+    return CohortAnalytics(_db)
+
+def consume_file(path):
+    """Reads a generated temp file for st.download_button and removes it from disk."""
+    with open(path, "rb") as f:
+        data = f.read()
+    os.remove(path)
+    return data
+
+def activity_page(prefix, status, student_ids, page_size=12):
+    """Renders SQL-side filters for an activity list and returns (current page, next cursor)."""
+    f1, f2, f3, f4 = st.columns(4)
+    filters = {
+        'student_id': f1.selectbox("Student", ["All"] + list(student_ids), key=f"{prefix}_student"),
+        'grade_section': f2.selectbox("Grade Section", ["All"] + db.get_grade_sections(), key=f"{prefix}_section"),
+        'date_from': f3.date_input("From", value=None, key=f"{prefix}_from"),
+        'date_to': f4.date_input("To", value=None, key=f"{prefix}_to"),
+    }
+    filters = {k: (None if v == "All" else v) for k, v in filters.items()}
+
+    # Cursor stack: [None, cursor of page 2, ...]; reset whenever the filters change
+    if st.session_state.get(f"{prefix}_filters") != filters:
+        st.session_state[f"{prefix}_filters"] = filters
+        st.session_state[f"{prefix}_cursors"] = [None]
+    cursors = st.session_state[f"{prefix}_cursors"]
+    return db.get_activity_page(status, page_size, cursors[-1], **filters)
+
+def page_controls(prefix, next_cursor):
+    cursors = st.session_state[f"{prefix}_cursors"]
+    c_prev, c_info, c_next = st.columns([1, 2, 1])
+    if c_prev.button("◀ Previous", key=f"{prefix}_prev", disabled=len(cursors) == 1, width="stretch"):
+        cursors.pop()
+        st.rerun()
+    c_info.caption(f"Page {len(cursors)}")
+    if c_next.button("Next ▶", key=f"{prefix}_next", disabled=next_cursor is None, width="stretch"):
+        cursors.append(next_cursor)
+        st.rerun()
+
+@st.fragment
+def cohort_report_view():
+    """Cohort Analytics tab; a fragment, so building the report or using its widgets reruns only this tab."""
+    st.subheader("📈 Cohort Grade Analytics")
+    analytics = cohort_analytics(db)
+    report, stale = analytics.latest()
+    if stale:
+        c_msg, c_btn = st.columns([3, 1])
+        c_msg.info("Build the report to see cohort statistics." if report is None
+                   else "Grades changed since this report was built.")
+        if c_btn.button("🔄 Build Report", key="cohort_build", width="stretch"):
+            with st.spinner("Crunching grades..."):
+                _, st.session_state.cohort_built_in = analytics.report()
+            st.rerun(scope="fragment")
+    if report is None:
+        if not stale:
+            st.info("No grades recorded yet.")
+        return
+
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Students", f"{report['students']:,}")
+    m2.metric("Grade Records", f"{report['records']:,}")
+    m3.metric("Pass Rate", f"{report['pass_rate']:.1%}")
+    m4.metric("At Risk", f"{len(report['at_risk']):,}")
+    built_in = st.session_state.pop('cohort_built_in', None)
+    if built_in:
+        st.caption(f"Report built in {built_in:.2f}s.")
+
+    subj = report['by_subject']
+    fig = go.Figure(go.Box(x=subj['subject'], q1=subj['p25'], median=subj['p50'], q3=subj['p75'],
+                           lowerfence=subj['p10'], upperfence=subj['p90'], mean=subj['mean'],
+                           name="Marks (p10–p90)"))
+    fig.add_hline(y=PASS_MARK, line_dash="dash", line_color="red", annotation_text="Pass Mark")
+    fig.update_layout(title="Mark Distribution by Subject")
+    st.plotly_chart(fig, width="stretch")
+
+    c1, c2 = st.columns(2)
+    with c1:
+        fig = px.line(report['trend'], x='period', y='mark', color='subject', markers=True,
+                      title="Average Mark per Term")
+        fig.add_hline(y=PASS_MARK, line_dash="dash", line_color="red")
+        st.plotly_chart(fig, width="stretch")
+    with c2:
+        deltas = report['deltas'].pivot(index='subject', columns='period', values='mean_delta')
+        fig = px.imshow(deltas, color_continuous_scale="RdYlGn", zmin=-5, zmax=5, aspect="auto",
+                        title="Term-over-Term Change (same students)")
+        st.plotly_chart(fig, width="stretch")
+
+    band_subject = st.selectbox("Mark bands for", report['by_subject']['subject'], key="cohort_band_subject")
+    bands = report['histogram'][report['histogram']['subject'] == band_subject]
+    st.plotly_chart(px.bar(bands, x='band', y='marks', title=f"{band_subject}: Marks by Band"), width="stretch")
+
+    with st.expander("Subject & Term Statistics"):
+        st.dataframe(report['by_subject'], hide_index=True, width="stretch")
+        st.dataframe(report['by_period'], hide_index=True, width="stretch")
+
+    with st.expander("Student Standings"):
+        standings = db.get_student_summaries()
+        st.dataframe(standings[['student_id', 'name', 'latest_period', 'latest_term_avg', 'trend_slope',
+                                'activity_count', 'pending_count', 'approved_count', 'last_activity_date']],
+                     hide_index=True, width="stretch")
+
+    st.write(f"### ⚠️ At-Risk Students ({len(report['at_risk']):,})")
+    st.caption(f"Latest term average below {PASS_MARK}, any failed subject in the latest term, "
+               "or a sharp drop since the previous term.")
+    st.dataframe(report['at_risk'].head(500), hide_index=True, width="stretch")
+    st.download_button("📥 Download Full At-Risk List (CSV)", data=lambda: report['at_risk'].to_csv(index=False),
+                       file_name="at_risk_students.csv", mime="text/csv", on_click="ignore")
+
 # --- 3. SESSION STATE ---
 # --- SESSION STATE INITIALIZATION ---
 if 'logged_in' not in st.session_state:
@@ -55,6 +179,9 @@ if 'logged_in' not in st.session_state:
         'interview_complete': False,
         'pending_project': None, 
         'roadmap_chat': [], 
+        # Bounded views of the two chats that are actually sent to the model
+        'interview_memory': ConversationMemory(window=12, labels=(("user", "Student"), ("assistant", "Journalist"))),
+        'mentor_memory': ConversationMemory(window=6),
         'hobbies_set': False,
         'event_grade_context': "Grade 9"
     })
@@ -93,8 +220,9 @@ with st.sidebar:
 if st.session_state.role == "Admin":
     st.title(" Admin Command Center")
     
-    t_records, t_tagging, t_users, t_bulk, t_audit, t_gallery, t_insight = st.tabs([
+    t_records, t_cohort, t_tagging, t_users, t_bulk, t_audit, t_gallery, t_insight = st.tabs([
         "📊 Academic Records", 
+        "📈 Cohort Analytics",
         "🏷️ Mass Event Tagging",
         "👥 User Management", 
         "📤 Master Bulk Import", 
@@ -107,8 +235,7 @@ if st.session_state.role == "Admin":
     # --- TAB 1: ACADEMIC RECORDS ---
     with t_records:
         st.subheader("Academic Record Management")
-        with db._get_connection() as conn:
-            students = pd.read_sql("SELECT student_id, name FROM users WHERE role='Student'", conn)
+        students = db.get_students()
         
         if not students.empty:
             target = st.selectbox("Select Student", options=students['student_id'], 
@@ -124,29 +251,69 @@ if st.session_state.role == "Admin":
                     db.update_grade(target, int(year), term, subject, mark)
                     st.success("Record Saved!")
 
-            g_df, _ = db.get_student_profile(target)
-            if not g_df.empty:
+            standing = db.get_student_summary(target)
+            if standing and standing['terms']:
+                s1, s2, s3, s4 = st.columns(4)
+                s1.metric(f"Average ({standing['latest_period']})", f"{standing['latest_term_avg']:.1f}")
+                s2.metric("Trend / Term", f"{standing['trend_slope'] or 0:+.1f}")
+                s3.metric("Activities", standing['activity_count'], help=f"{standing['pending_count']} awaiting approval")
+                s4.metric("Last Activity", standing['last_activity_date'] or "—")
+
+            chart = student_history_chart(db, target)
+            if chart:
                 st.divider()
-                g_df['period'] = g_df['year'].astype(str) + " - " + g_df['term'].astype(str)
-                term_order = ["Term 1", "Term 2", "Term 3", "Term 4"]
-                g_df['term'] = pd.Categorical(g_df['term'], categories=term_order, ordered=True)
-                g_df = g_df.sort_values(['year', 'term'])
-                
-                fig = px.line(g_df, x='period', y='mark', color='subject', markers=True,
-                            title=f"Performance History: {target}")
-                fig.add_hline(y=50, line_dash="dash", line_color="red", annotation_text="Pass Mark")
-                st.plotly_chart(fig, width="stretch")
+                fig, years, aggregated = chart
+                v1, v2 = st.columns([3, 1])
+                compare = v2.toggle("Compare students", key="records_compare")
+                if compare:
+                    others = v1.multiselect("Compare with", [s for s in students['student_id'] if s != target],
+                                            max_selections=3, key="records_compare_ids")
+                    cols = st.columns(len(others) + 1)
+                    for col, sid in zip(cols, [target] + others):
+                        other = student_history_chart(db, sid, height=320)
+                        if other:
+                            col.plotly_chart(other[0], width="stretch", key=f"cmp_{sid}")
+                        else:
+                            col.caption(f"{sid}: no grades yet.")
+                else:
+                    if aggregated:
+                        drill = v1.selectbox("Drill into year", ["All years"] + years, key="records_drill")
+                        if drill != "All years":
+                            fig = student_history_chart(db, target, year=drill)[0]
+                    st.plotly_chart(fig, width="stretch")
 
+            st.download_button(
+                label="🗂️ Download Student Portfolio (ZIP)",
+                data=lambda: consume_file(db.get_full_portfolio_zip(target)),
+                file_name=f"portfolio_{target}.zip",
+                mime="application/zip",
+                on_click="ignore",
+                width="stretch"
+            )
 
         st.subheader("📊 Database Management")
-        excel_data = db.export_to_excel()
         st.download_button(
             label="📥 Export Full Database to Excel",
-            data=excel_data,
+            # Runs only when the button is clicked; the workbook is rebuilt only if data changed
+            data=db.get_cached_export,
             file_name=f"school_backup_{datetime.now().strftime('%Y%m%d')}.xlsx",
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            on_click="ignore",
             width="stretch"
         )
+        with st.expander("⚙️ Query Cache Statistics"):
+            st.json(db.cache_stats())
+        with st.expander("🔑 AI Key Pool"):
+            st.dataframe(ai_core.backend.stats(), hide_index=True, width="stretch")
+            for provider in getattr(ai_core.backend, 'providers', []):
+                st.caption(f"{provider.name} keys")
+                st.dataframe(provider.backend.stats(), hide_index=True, width="stretch")
+            st.caption("Response cache (roadmaps & insights)")
+            st.json(ai_core.response_cache.stats())
+        with st.expander("🗄️ Evidence Storage"):
+            stats = db.get_storage_stats()
+            st.caption(f"{stats['references']} uploads stored as {stats['objects']} unique files; "
+                       f"deduplication saved {stats['saved_bytes'] / 1_048_576:.1f} MB.")
     
     #--- Tab 3: Students Management System ---
     with t_users:
@@ -182,16 +349,25 @@ if st.session_state.role == "Admin":
         with col_roster:
             st.markdown("### 📋 System Roster")
             
-            # 1. Fetch data
-            users_df, _, _ = db.get_all_data_for_export()
-            
-            # 2. Search & Filter
-            search_query = st.text_input("🔍 Search by Name or ID", placeholder="Type to filter...")
-            if search_query:
-                users_df = users_df[
-                    users_df['name'].str.contains(search_query, case=False) | 
-                    users_df['student_id'].str.contains(search_query, case=False)
-                ]
+            # 1. Search & Filter (done in SQL, one page at a time)
+            f1, f2 = st.columns([2, 1])
+            filters = {
+                'search': f1.text_input("🔍 Search by Name or ID", placeholder="Starts with..."),
+                'role': f2.selectbox("Role", ["All", "Student", "Admin"]),
+            }
+            filters = {k: (None if v == "All" else v) for k, v in filters.items()}
+            if st.session_state.get("roster_filters") != filters:
+                st.session_state["roster_filters"] = filters
+                st.session_state["roster_cursors"] = [None]
+            cursors = st.session_state["roster_cursors"]
+
+            # 2. Fetch the current page
+            users_df, next_cursor, total = db.get_user_page(cursor=cursors[-1], **filters)
+            if users_df.empty and len(cursors) > 1:
+                # The last users on this page were deleted; step back a page
+                cursors.pop()
+                st.rerun()
+            st.caption(f"{total:,} users · {ROSTER_PAGE_SIZE} per page")
 
             # 3. User Cards
             if users_df.empty:
@@ -227,7 +403,12 @@ if st.session_state.role == "Admin":
                                     else: st.error("Failed.")
                                 else:
                                     st.warning("Empty password.")
+                page_controls("roster", next_cursor)
         
+    # --- COHORT ANALYTICS ---
+    with t_cohort:
+        cohort_report_view()
+
     # --- TAB 2: MASS EVENT TAGGING (NEW) ---
     with t_tagging:
         st.subheader("Mass Event Portfolio Sync")
@@ -243,23 +424,16 @@ if st.session_state.role == "Admin":
             
             if st.form_submit_button("🚀 Sync to Selected Portfolios"):
                 if e_title and selected_students:
-                    for s_id in selected_students:
-                        db.save_activity(s_id, e_title, e_desc, e_skills, None)
-                        # Manually update grade_section for bulk entries
-                        with db._get_connection() as conn:
-                            conn.execute("UPDATE activities SET grade_section=? WHERE student_id=? AND title=?", 
-                                         (e_grade, s_id, e_title))
-                            conn.commit()
-                    st.success(f"Portfolios updated for {len(selected_students)} students!")
+                    created = db.tag_event(selected_students, e_title, e_desc, e_skills, grade_section=e_grade)
+                    st.success(f"Portfolios updated for {len(created)} students!")
                 else:
                     st.error("Please provide an event title and select at least one student.")
 
     # --- TAB 5: EVIDENCE AUDIT (NEW) ---
     with t_audit:
         st.subheader("🛡️ Evidence Verification Queue")
-        with db._get_connection() as conn:
-            # ONLY fetch pending items for the audit
-            all_a = pd.read_sql("SELECT * FROM activities WHERE status='pending' ORDER BY date DESC", conn)
+        # ONLY fetch pending items for the audit, one page at a time
+        all_a, next_cursor = activity_page("audit", 'pending', students['student_id'])
         
         if not all_a.empty:
             for idx, r in all_a.iterrows():
@@ -270,27 +444,23 @@ if st.session_state.role == "Admin":
                         st.write(f"**Summary:** {r['summary']}")
                         st.caption(f"Date: {r['date']}")
                     with c2:
-                        if r['file_path'] and os.path.exists(str(r['file_path'])):
-                            st.image(r['file_path'], width=200)
+                        img = best_image(r, 'small')
+                        if img:
+                            st.image(img, width=200)
                         else:
                             st.caption("No image evidence.")
                     with c3:
                         # APPROVE BUTTON
-                        if st.button("✅ Approve", key=f"app_{idx}", width="stretch"):
-                            with db._get_connection() as conn:
-                                conn.execute("UPDATE activities SET status='approved' WHERE student_id=? AND title=? AND date=?", 
-                                            (r['student_id'], r['title'], r['date']))
-                                conn.commit()
+                        if st.button("✅ Approve", key=f"app_{r['id']}", width="stretch"):
+                            db.update_activity_status(int(r['id']), 'approved')
                             st.success("Moved to Gallery!")
                             st.rerun()
                         
                         # DELETE BUTTON
-                        if st.button("🗑️ Reject/Delete", key=f"audit_del_{idx}", width="stretch"):
-                            with db._get_connection() as conn:
-                                conn.execute("DELETE FROM activities WHERE student_id=? AND title=? AND date=?", 
-                                            (r['student_id'], r['title'], r['date']))
-                                conn.commit()
+                        if st.button("🗑️ Reject/Delete", key=f"audit_del_{r['id']}", width="stretch"):
+                            db.delete_activity(int(r['id']))
                             st.rerun()
+            page_controls("audit", next_cursor)
         else:
             st.info("Queue clear! No pending evidence to verify.")
 
@@ -307,13 +477,21 @@ if st.session_state.role == "Admin":
                     st.caption("CSV Headers: student_id, password, role, name")
                     u_file = st.file_uploader("Upload Users", type="csv", key="bulk_u")
                     if u_file and st.button("Confirm User Import"):
-                        df = pd.read_csv(u_file)
-                        for _, r in df.iterrows():
-                            hp = bcrypt.hashpw(str(r['password']).encode(), bcrypt.gensalt())
-                            with db._get_connection() as conn:
-                                conn.execute("INSERT OR IGNORE INTO users VALUES (?,?,?,?)", 
-                                            (str(r['student_id']), hp, r['role'], r['name']))
-                        st.success(f"Imported {len(df)} users!")
+                        df = pd.read_csv(u_file, dtype={'student_id': str, 'password': str})
+                        bar = st.progress(0.0, text="Hashing passwords...")
+                        try:
+                            result = db.bulk_create_users(
+                                df, progress=lambda done, total: bar.progress(done / total, text=f"Hashing passwords... {done}/{total}"))
+                        except ValueError as e:
+                            bar.empty()
+                            st.error(str(e))
+                        else:
+                            bar.progress(1.0, text="Done")
+                            st.success(f"Imported {result['created']} users!")
+                            if result['duplicates']:
+                                st.warning(f"Skipped {len(result['duplicates'])} existing IDs: {', '.join(result['duplicates'][:20])}")
+                            if not result['errors'].empty:
+                                st.dataframe(result['errors'], hide_index=True, width="stretch")
 
             with col_g:
                 with st.container(border=True):
@@ -321,21 +499,41 @@ if st.session_state.role == "Admin":
                     st.caption("CSV Headers: student_id, year, term, subject, mark")
                     g_file = st.file_uploader("Upload Grades", type="csv", key="bulk_g")
                     if g_file and st.button("Confirm Grade Import"):
-                        df = pd.read_csv(g_file)
-                        count = 0
-                        for _, r in df.iterrows():
-                            db.update_grade(str(r['student_id']), int(r['year']), str(r['term']), str(r['subject']), int(r['mark']))
-                            count += 1
-                        st.success(f"Imported {count} academic records!")
+                        df = pd.read_csv(g_file, dtype={'student_id': str})
+                        bar = st.progress(0.0, text="Writing grades...")
+                        try:
+                            result = db.bulk_upsert_grades(
+                                df, progress=lambda done, total: bar.progress(done / total, text=f"Writing grades... {done}/{total}"))
+                        except ValueError as e:
+                            bar.empty()
+                            st.error(str(e))
+                        else:
+                            bar.progress(1.0, text="Done")
+                            st.success(f"Imported {result['inserted']} new and updated {result['updated']} academic records!")
+                            if not result['errors'].empty:
+                                st.warning(f"{len(result['errors'])} rows were skipped.")
+                                st.dataframe(result['errors'], hide_index=True, width="stretch")
 
     with t_gallery:
         st.subheader("🖼️ Global Evidence Gallery")
         st.caption("Showing verified student achievements.")
+
+        sections = db.get_grade_sections()
+        if sections:
+            c_sec, c_zip = st.columns([2, 1])
+            archive_section = c_sec.selectbox("Class-wide archive", sections, key="archive_section")
+            c_zip.download_button(
+                label="🗂️ Download Class Archive (ZIP)",
+                data=lambda: consume_file(db.get_section_portfolio_zip(archive_section)),
+                file_name=f"portfolios_{archive_section}.zip",
+                mime="application/zip",
+                on_click="ignore",
+                width="stretch"
+            )
         
-        with db._get_connection() as conn:
-            # ONLY fetch approved items for the gallery
-            approved_a = pd.read_sql("SELECT * FROM activities WHERE status='approved' ORDER BY date DESC", conn)
-            
+        # ONLY fetch approved items for the gallery, one page at a time
+        approved_a, next_cursor = activity_page("gallery", 'approved', students['student_id'])
+
         if not approved_a.empty:
             # Create a grid layout for a better gallery look
             cols = st.columns(2) 
@@ -343,9 +541,11 @@ if st.session_state.role == "Admin":
                 with cols[idx % 2]: # Alternate between columns
                     with st.container(border=True):
                         st.write(f"**{r['student_id']}** - {r['title']}")
-                        if r.get('file_path') and os.path.exists(str(r['file_path'])):
-                            st.image(r['file_path'], width="stretch")
+                        img = best_image(r, 'large')
+                        if img:
+                            st.image(img, width="stretch")
                         st.write(f"*{r['summary']}*")
+            page_controls("gallery", next_cursor)
         else:
             st.info("No verified evidence in the gallery yet.")
         
@@ -357,34 +557,49 @@ if st.session_state.role == "Admin":
             target_insight = st.selectbox("Select Student to Analyze", options=students['student_id'], key="insight_sel",
                                         format_func=lambda x: f"{x} - {students[students['student_id']==x]['name'].values[0]}")
             
+            standing = db.get_student_summary(target_insight)
+            if standing and standing['terms']:
+                st.caption(f"Latest average {standing['latest_term_avg']:.1f} ({standing['latest_period']}), "
+                           f"trend {standing['trend_slope'] or 0:+.1f}/term, {standing['activity_count']} activities "
+                           f"({standing['approved_count']} approved).")
+                st.dataframe(pd.read_json(io.StringIO(standing['latest_marks']), typ='series').rename("Latest Mark"),
+                             width="stretch")
+
             if st.button("Generate Administrative Insight", type="primary"):
-                g_data, a_data = db.get_student_profile(target_insight)
-                
-                # Formulating a high-level admin prompt
-                admin_prompt = f"""
-                Analyze this student for the administration:
-                - Grades: {g_data.to_string()}
-                - Portfolio: {a_data.to_string()}
-                
-                Provide:
-                1. FUTURE PERSPECTIVE: What career path is this student naturally gravitating toward?
-                2. AREAS TO IMPROVE: Based on grades or project gaps, what should they work on?
-                3. HELP NEEDED: Where should teachers/parents intervene to support them?
-                """
-                
                 with st.spinner("AI is analyzing student potential..."):
                     try:
-                        # Reusing the roadmap logic for administrative insight
-                        analysis = ai_core.get_career_roadmap(g_data, a_data, "General Administrative Assessment")
+                        # Same prompt, cache entry and student_insights row as the cohort run below
+                        analysis = InsightBatchJob(db, ai_core).generate(target_insight)
                         
                         st.divider()
-                        c1, c2, c3 = st.columns(3)
-                        
                         # We display the analysis in a clean "3-Pillar" layout
                         with st.container(border=True):
                             st.markdown(analysis)
-                    except:
-                        st.error("Could not generate insight. Ensure student has enough data.")
+                    except LLMUnavailableError:
+                        st.error("Could not generate insight right now. Please try again in a moment.")
+
+            st.divider()
+            with st.container(border=True):
+                st.write("### 🏫 Cohort Insights")
+                st.caption("Runs the three-section analysis for every student in scope. Students whose data "
+                           "has not changed since their last insight are skipped, so an interrupted run can simply be restarted.")
+                b1, b2 = st.columns([3, 1])
+                scope = b1.selectbox("Scope", ["Whole school"] + db.get_grade_sections(), key="insight_scope")
+                force = b2.checkbox("Regenerate all", key="insight_force")
+                if st.button("Run Cohort Analysis"):
+                    bar = st.progress(0.0, text="Preparing cohort...")
+                    report = InsightBatchJob(db, ai_core).run(
+                        None if scope == "Whole school" else scope, force=force,
+                        progress=lambda done, total, sid: bar.progress(done / total if total else 1.0,
+                                                                       text=f"Analyzing students... {done}/{total}"))
+                    bar.progress(1.0, text="Done")
+                    st.success(f"Generated {report['processed']} insights ({report['skipped']} already up to date) "
+                               f"in {report['elapsed_s']}s — {report['per_minute']} students/min.")
+                    if report['failed']:
+                        st.warning(f"{report['failed']} students could not be analyzed; run again to retry them.")
+                insights = db.get_student_insights()
+                if not insights.empty:
+                    st.dataframe(insights.drop(columns=['fingerprint']), hide_index=True, width="stretch")
 
 
 # --- 7. STUDENT VIEW ---
@@ -398,6 +613,7 @@ else:
         col_h.subheader("💬 Log Your Success")
         if col_r.button("🔄 Redo Interview", width="stretch"):
             st.session_state.update({'interview_complete': False, 'chat_history': [], 'interview_counter': -1, 'pending_project': None})
+            st.session_state.interview_memory.reset()
             st.rerun()
 
         # Phase A: Initial Grade Context
@@ -421,23 +637,29 @@ else:
             if p := st.chat_input("Tell me what you did..."):
                 st.session_state.interview_counter += 1
                 st.session_state.chat_history.append({"role": "user", "content": p})
+                with st.chat_message("user"): st.markdown(p)
                 
-                with st.spinner("Journalist is typing..."):
-                    # Logic note: ai_interviewer should trigger SAVE_DATA at counter == 5
-                    res = ai_core.get_ai_response(p, st.session_state.chat_history, st.session_state.interview_counter)
+                # Tokens render as they arrive; write_stream hands back the assembled reply
+                # Logic note: ai_interviewer should trigger SAVE_DATA at counter == 5
+                try:
+                    with st.chat_message("assistant"):
+                        res = st.write_stream(ai_core.stream_ai_response(p, st.session_state.chat_history, st.session_state.interview_counter,
+                                                                         st.session_state.interview_memory))
+                except LLMUnavailableError:
+                    # Every key is busy: undo this turn so the student can simply send it again
+                    st.session_state.chat_history.pop()
+                    st.session_state.interview_counter -= 1
+                    st.error(f"The Journalist is overloaded right now. Please resend your answer in a moment:\n\n> {p}")
+                    st.stop()
                 
                 st.session_state.chat_history.append({"role": "assistant", "content": res})
                 
                 if "SAVE_DATA" in res:
-                    try:
-                        data = res.split("SAVE_DATA")[1].strip(": ").split("|")
-                        st.session_state.pending_project = {
-                            "grade": st.session_state.event_grade_context,
-                            "title": data[1].strip(), 
-                            "skills": data[2].strip(), "summary": data[3].strip()
-                        }
+                    project = ai_core.extract_save_data(res)
+                    if project:
+                        st.session_state.pending_project = {"grade": st.session_state.event_grade_context, **project}
                         st.session_state.interview_complete = True
-                    except: st.error("AI Error. Please reply one more time.")
+                    else: st.error("AI Error. Please reply one more time.")
                 st.rerun()
 
         # Phase C: The Evidence BBox
@@ -451,17 +673,19 @@ else:
                 with st.form("finalize_ai_entry"):
                     up_img = st.file_uploader("Upload Image Proof (Mandatory)", type=['jpg','png','jpeg'])
                     if st.form_submit_button("🚀 Finalize & Save to Portfolio") and up_img:
-                        path = pf_manager.save_evidence(st.session_state.user, up_img)
-                        db.save_activity(st.session_state.user, st.session_state.pending_project['title'], 
-                                         st.session_state.pending_project['summary'], 
-                                         st.session_state.pending_project['skills'], path)
-                        
-                        # Apply Grade Selection
-                        with db._get_connection() as conn:
-                            conn.execute("UPDATE activities SET grade_section=? WHERE student_id=? AND title=?", 
-                                         (st.session_state.event_grade_context, st.session_state.user, st.session_state.pending_project['title']))
+                        try:
+                            path, thumbs = pf_manager.save_evidence(st.session_state.user, up_img)
+                            db.save_activity(st.session_state.user, st.session_state.pending_project['title'], 
+                                             st.session_state.pending_project['summary'], 
+                                             st.session_state.pending_project['skills'], path,
+                                             grade_section=st.session_state.event_grade_context, thumbnails=thumbs)
+                        except FileNotFoundError as e:
+                            # The stored copy was cleaned up between dedup lookup and save; the draft is kept
+                            st.error(str(e))
+                            st.stop()
                         
                         st.session_state.update({'interview_complete': False, 'chat_history': [], 'interview_counter': -1})
+                        st.session_state.interview_memory.reset()
                         st.rerun()
                     else: 
                         st.error("Can't proceed without evidence; upload a photo")
@@ -488,17 +712,11 @@ else:
                                 u_id = st.session_state.user['id'] if isinstance(st.session_state.user, dict) else st.session_state.user
 
                                 # 1. Save the file
-                                path = pf_manager.save_evidence(u_id, m_img)
-                                
-                                # 2. Save to database
-                                db.save_activity(u_id, m_title, m_desc, m_skills, path)
+                                path, thumbs = pf_manager.save_evidence(u_id, m_img)
                                 
-                                # 3. Update the grade section
-                                with db._get_connection() as conn:
-                                    conn.execute(
-                                        "UPDATE activities SET grade_section=? WHERE student_id=? AND title=?", 
-                                        (m_grade, u_id, m_title)
-                                    )
+                                # 2. Save to database (with its grade section)
+                                db.save_activity(u_id, m_title, m_desc, m_skills, path, grade_section=m_grade,
+                                                 thumbnails=thumbs)
                                 
                                 st.success("Achievement saved successfully!")
                                 st.rerun()
@@ -516,12 +734,13 @@ else:
                     with st.container(border=True):
                         st.markdown(f"### {row['title']}")
                         st.caption(f"Grade: {row.get('grade_section', 'N/A')} | Date: {row['date']}")
-                        if row['file_path']: st.image(row['file_path'], width="stretch")
+                        img = best_image(row, 'large')
+                        if img: st.image(img, width="stretch")
                         st.write(row['summary'])
                         with st.popover("🗑️ Delete"):
                             st.error("This action cannot be undone!")
-                            if st.button("Delete Project", key=f"std_del_{idx}"):
-                                db.delete_activity(st.session_state.user, row['title'], row['date'])
+                            if st.button("Delete Project", key=f"std_del_{row['id']}"):
+                                db.delete_activity(int(row['id']), sid=st.session_state.user)
                                 st.rerun()
 
     # --- TAB 3: CAREER MENTOR CHATBOT ---
@@ -531,12 +750,21 @@ else:
             h = st.text_area("Tell the AI your hobbies and dream jobs:")
             if st.button("Initialize Mentor"):
                 st.session_state.update({'hobbies_set': True, 'roadmap_chat': [{"role": "assistant", "content": "Ready! Ask me anything about your future path."}]})
+                st.session_state.mentor_memory.reset()
                 st.rerun()
         else:
             for msg in st.session_state.roadmap_chat:
                 with st.chat_message(msg["role"]): st.markdown(msg["content"])
             if q := st.chat_input("Ask about your career..."):
                 st.session_state.roadmap_chat.append({"role": "user", "content": q})
-                res = ai_core.get_career_roadmap(g_data, a_data, f"Chat Context: {st.session_state.roadmap_chat}. User Question: {q}")
+                with st.chat_message("user"): st.markdown(q)
+                try:
+                    with st.chat_message("assistant"):
+                        res = st.write_stream(ai_core.stream_mentor_reply(g_data, a_data, st.session_state.roadmap_chat,
+                                                                          st.session_state.mentor_memory))
+                except LLMUnavailableError:
+                    st.session_state.roadmap_chat.pop()
+                    st.error(f"Mentor is currently offline. Please ask again in a moment:\n\n> {q}")
+                    st.stop()
                 st.session_state.roadmap_chat.append({"role": "assistant", "content": res})
                 st.rerun()
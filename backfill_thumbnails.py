@@ -0,0 +1,50 @@
+"""
+Generates thumbnails for evidence uploaded before the image pipeline existed.
+
+Usage:  python backfill_thumbnails.py [path/to/school_portal.db] [--overwrite]
+"""
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from database import DatabaseManager
+from image_pipeline import create_thumbnails
+
+BATCH_SIZE = 200
+
+
+def backfill(db, overwrite=False, workers=4):
+    where = "file_path IS NOT NULL" if overwrite else \
+        "file_path IS NOT NULL AND (thumb_small IS NULL OR thumb_large IS NULL)"
+    done = skipped = 0
+    last_id = 0
+    # Pillow releases the GIL while resizing, so a thread pool keeps several cores busy
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            with db._get_connection() as conn:
+                rows = conn.execute(f"SELECT id, file_path FROM activities WHERE {where} AND id > ? ORDER BY id LIMIT ?",
+                                    (last_id, BATCH_SIZE)).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            results = pool.map(lambda row: (row[0], create_thumbnails(row[1], overwrite=overwrite)), rows)
+            updates = []
+            for act_id, thumbs in results:
+                if thumbs:
+                    updates.append((thumbs['small'], thumbs['large'], act_id))
+                else:
+                    skipped += 1
+            with db._get_connection() as conn:
+                conn.executemany("UPDATE activities SET thumb_small=?, thumb_large=? WHERE id=?", updates)
+                conn.commit()
+            done += len(updates)
+            print(f"  ...{done} thumbnailed, {skipped} skipped (missing or unreadable)")
+
+    db.cache.clear()
+    return done, skipped
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    db_path = args[0] if args else "school_portal.db"
+    done, skipped = backfill(DatabaseManager(db_path), overwrite="--overwrite" in sys.argv)
+    print(f"✅ Backfill complete: {done} activities updated, {skipped} skipped.")
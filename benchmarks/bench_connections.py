@@ -0,0 +1,81 @@
+"""
+Per-query latency: one sqlite3.connect per call (old behaviour) vs the pooled
+WAL connections used by DatabaseManager.
+
+Run from the repo root:  python benchmarks/bench_connections.py
+"""
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database import DatabaseManager
+
+QUERIES = 2000
+THREADS = 4
+
+
+def seed(db):
+    with db._get_connection() as conn:
+        conn.executemany("INSERT OR IGNORE INTO users VALUES (?,?,?,?)",
+                         [(f"S{i:04d}", b"x", "Student", f"Student {i}") for i in range(500)])
+        # (student, term, subject) repeats every 1000 rows; a different year per block keeps ux_grades_slot unique
+        conn.executemany("INSERT INTO grades VALUES (?,?,?,?,?)",
+                         [(f"S{i % 500:04d}", 2025 - i // 1000, f"Term {i % 4 + 1}", f"Subject {i % 8}", i % 100)
+                          for i in range(4000)])
+
+
+def legacy_query(db_path, sid):
+    # Mirrors the original _get_connection(): a fresh connection that is never closed
+    with sqlite3.connect(db_path, check_same_thread=False) as conn:
+        conn.execute("SELECT * FROM grades WHERE student_id=?", (sid,)).fetchall()
+
+
+def pooled_query(db, sid):
+    with db._get_connection() as conn:
+        conn.execute("SELECT * FROM grades WHERE student_id=?", (sid,)).fetchall()
+
+
+def run(label, fn):
+    timings = []
+    lock = threading.Lock()
+
+    def worker(offset):
+        local = []
+        for i in range(QUERIES // THREADS):
+            start = time.perf_counter()
+            fn(f"S{(i + offset) % 500:04d}")
+            local.append(time.perf_counter() - start)
+        with lock:
+            timings.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(n * 100,)) for n in range(THREADS)]
+    wall = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - wall
+
+    timings.sort()
+    p95 = timings[int(len(timings) * 0.95)]
+    print(f"{label:<24} mean {statistics.mean(timings) * 1e6:8.1f} us | "
+          f"p95 {p95 * 1e6:8.1f} us | {len(timings) / wall:8.0f} queries/s")
+    return statistics.mean(timings)
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        db = DatabaseManager(db_path)
+        seed(db)
+
+        print(f"{QUERIES} lookups across {THREADS} threads")
+        before = run("connect-per-query", lambda sid: legacy_query(db_path, sid))
+        after = run("pooled (WAL)", lambda sid: pooled_query(db, sid))
+        print(f"speed-up: {before / after:.1f}x")
+        db.pool.close()
@@ -0,0 +1,103 @@
+"""
+Load test for the Achievement Journalist: N students interviewing at once against
+fake_llm.FakeBackend (no network, no keys), reporting turn latency percentiles.
+
+Each simulated session runs the full six-turn interview through
+EvidenceInterviewer.stream_ai_response, so the key pool, retries and conversation
+memory are all on the measured path.
+
+Run from the repo root:
+    python benchmarks/bench_llm_load.py --sessions 50 --keys 3 --latency 0.3 --tps 300 --rate-limit 0.05
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ai_interviewer import EvidenceInterviewer
+from conversation_memory import ConversationMemory
+from fake_llm import FakeBackend
+from groq_pool import LLMUnavailableError
+
+TURNS = 6
+ANSWER = "I built a line-following robot with two friends for the regional science fair and wrote the PID code."
+
+
+def session(ai, results, lock, think):
+    history, memory = [], ConversationMemory(window=12)
+    turns, firsts, failed = [], [], 0
+    for counter in range(TURNS):
+        history.append({"role": "user", "content": ANSWER})
+        start = time.perf_counter()
+        first, reply = None, []
+        try:
+            for chunk in ai.stream_ai_response(ANSWER, history, counter, memory):
+                if first is None:
+                    first = time.perf_counter() - start
+                reply.append(chunk)
+        except LLMUnavailableError:
+            # The app rolls the turn back and the student retries later
+            history.pop()
+            failed += 1
+            continue
+        turns.append(time.perf_counter() - start)
+        firsts.append(first)
+        history.append({"role": "assistant", "content": "".join(reply)})
+        if think:
+            time.sleep(think)
+    with lock:
+        results['turn'].extend(turns)
+        results['first_token'].extend(firsts)
+        results['failed'] += failed
+
+
+def percentiles(values):
+    if len(values) < 2:
+        return {p: (values[0] if values else float('nan')) for p in (50, 95, 99)}
+    cuts = statistics.quantiles(values, n=100, method='inclusive')
+    return {50: cuts[49], 95: cuts[94], 99: cuts[98]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sessions", type=int, default=20, help="concurrent interview sessions")
+    parser.add_argument("--keys", type=int, default=2, help="fake API keys in the pool")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds to first token")
+    parser.add_argument("--tps", type=float, default=400, help="streamed tokens per second")
+    parser.add_argument("--errors", type=float, default=0.0, help="fraction of requests failing with a 500")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="fraction of requests answered with a 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="retry-after seconds on injected 429s")
+    parser.add_argument("--think", type=float, default=0.0, help="seconds a student takes to answer")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    backend = FakeBackend(keys=args.keys, seed=args.seed, latency=args.latency, tokens_per_second=args.tps,
+                          error_rate=args.errors, rate_limit_rate=args.rate_limit, retry_after=args.retry_after)
+    ai = EvidenceInterviewer([], backend=backend)
+    results, lock = {'turn': [], 'first_token': [], 'failed': 0}, threading.Lock()
+
+    wall = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.sessions) as pool:
+        for _ in range(args.sessions):
+            pool.submit(session, ai, results, lock, args.think)
+    wall = time.perf_counter() - wall
+
+    total = args.sessions * TURNS
+    print(f"{args.sessions} sessions x {TURNS} turns on {args.keys} keys "
+          f"(latency {args.latency}s, {args.tps:.0f} tok/s, 500s {args.errors:.0%}, 429s {args.rate_limit:.0%})")
+    for label, key in (("turn latency", 'turn'), ("first token", 'first_token')):
+        p = percentiles(results[key])
+        print(f"{label:<14} p50 {p[50] * 1e3:8.1f} ms | p95 {p[95] * 1e3:8.1f} ms | p99 {p[99] * 1e3:8.1f} ms")
+    print(f"completed {len(results['turn'])}/{total} turns, {results['failed']} failed, "
+          f"{len(results['turn']) / wall:.1f} turns/s over {wall:.1f}s")
+    for slot in backend.stats():
+        print(f"  key {slot['key']}: {slot['requests']} requests, {slot['rate_limited']} rate-limited, "
+              f"{slot['errors']} errors")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Bounded chat memory: the last few messages verbatim plus a rolling summary of
+everything older, so the tokens sent per turn stay flat however long a chat runs.
+
+The full history stays in st.session_state for display; a ConversationMemory kept
+next to it turns that history into the chat messages actually sent to the model.
+"""
+import re
+from prompt_context import CHARS_PER_TOKEN, estimate_tokens
+
+_SENTENCE = re.compile(r"(?<=[.!?])\s")
+
+
+def truncate_to_tokens(text, max_tokens):
+    """Cuts ``text`` at a word boundary so it fits ``max_tokens`` (estimated)."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    cut = text[:max_tokens * CHARS_PER_TOKEN - 1].rsplit(' ', 1)[0]
+    return cut + "…"
+
+
+def _gist(text, max_chars=140):
+    """First sentence of a message, squeezed onto one line."""
+    text = " ".join(text.split())
+    first = _SENTENCE.split(text, 1)[0]
+    return first if len(first) <= max_chars else first[:max_chars].rsplit(' ', 1)[0] + "…"
+
+
+class ConversationMemory:
+    """
+    Sliding window over a chat history with a rolling summary of the evicted turns.
+
+    ``messages(history)`` returns role-tagged messages: a system note with the summary
+    (once anything has scrolled out of the window), then the last ``window`` messages,
+    each capped at ``max_turn_tokens``. Messages that leave the window are folded into
+    the summary once, as one line each; past ``max_summary_tokens`` the oldest lines go.
+    """
+
+    def __init__(self, window=6, max_turn_tokens=300, max_summary_tokens=200,
+                 labels=(("user", "Student"), ("assistant", "Mentor"))):
+        self.window = window
+        self.max_turn_tokens = max_turn_tokens
+        self.max_summary_tokens = max_summary_tokens
+        self.labels = dict(labels)
+        self._lines = []
+        self._summarized = 0
+
+    @property
+    def summary(self):
+        return "\n".join(self._lines)
+
+    def reset(self):
+        self._lines = []
+        self._summarized = 0
+
+    def _fold(self, evicted):
+        for msg in evicted:
+            label = self.labels.get(msg["role"], msg["role"])
+            self._lines.append(f"- {label}: {_gist(msg['content'])}")
+        while len(self._lines) > 1 and estimate_tokens(self.summary) > self.max_summary_tokens:
+            self._lines.pop(0)
+
+    def messages(self, history):
+        if len(history) < self._summarized:
+            # The history was cleared or rewound past the summary; start over
+            self.reset()
+        cut = max(0, len(history) - self.window)
+        if cut > self._summarized:
+            self._fold(history[self._summarized:cut])
+            self._summarized = cut
+
+        messages = []
+        if self._lines:
+            messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{self.summary}"})
+        for msg in history[cut:]:
+            messages.append({"role": msg["role"], "content": truncate_to_tokens(msg["content"], self.max_turn_tokens)})
+        return messages
@@ -1,22 +1,224 @@
 import sqlite3
 import pandas as pd
 import bcrypt
-import io
 from datetime import datetime
-import zipfile
 import os
+import queue
+import tempfile
+import threading
+import xlsxwriter
+from collections import deque
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from portfolio_archive import PortfolioArchiver
+from query_cache import QueryCache
+from image_pipeline import THUMBNAIL_SIZES, thumbnail_path
 
 
+GRADE_COLUMNS = ['student_id', 'year', 'term', 'subject', 'mark']
+
+GRADE_UPSERT_SQL = '''INSERT INTO grades (student_id, year, term, subject, mark) VALUES (?,?,?,?,?)
+                        ON CONFLICT (student_id, year, term, subject) DO UPDATE SET mark=excluded.mark'''
+
+# The evidence file and its thumbnails are fixed at save time: save_activity and the
+# deletes keep their evidence_blobs references, which a plain column update would skip
+ACTIVITY_EDITABLE_COLUMNS = {'title', 'summary', 'skills', 'grade_section', 'status'}
+
+# What the Evidence Audit / Data Gallery cards display
+ACTIVITY_CARD_COLUMNS = ['id', 'student_id', 'title', 'summary', 'date', 'file_path', 'grade_section',
+                         'thumb_small', 'thumb_large']
+
+USER_COLUMNS = ['student_id', 'password', 'role', 'name']
+
+# Recomputes student_summary rows from grades/activities. {target} selects the students
+# to refresh; rows are deleted first, so students that no longer exist simply drop out.
+SUMMARY_REFRESH_SQL = '''
+WITH target AS (SELECT student_id FROM users WHERE role='Student' {target}),
+periods AS (
+    SELECT student_id, year, term, AVG(mark) AS avg_mark,
+           ROW_NUMBER() OVER (PARTITION BY student_id ORDER BY year, term) AS x
+    FROM grades WHERE student_id IN (SELECT student_id FROM target)
+    GROUP BY student_id, year, term),
+fit AS (
+    SELECT student_id, COUNT(*) AS n, SUM(x) AS sx, SUM(avg_mark) AS sy,
+           SUM(x * avg_mark) AS sxy, SUM(x * x) AS sxx, MAX(x) AS last_x
+    FROM periods GROUP BY student_id),
+latest_marks AS (
+    -- SQLite takes bare columns (mark) from the row that holds the MAX(), i.e. the latest term
+    SELECT student_id, json_group_object(subject, mark) AS marks FROM (
+        SELECT student_id, subject, mark, MAX(year || '|' || term)
+        FROM grades WHERE student_id IN (SELECT student_id FROM target)
+        GROUP BY student_id, subject)
+    GROUP BY student_id),
+acts AS (
+    SELECT student_id, COUNT(*) AS total, SUM(status = 'pending') AS pending,
+           SUM(status = 'approved') AS approved, MAX(date) AS last_date
+    FROM activities WHERE student_id IN (SELECT student_id FROM target) GROUP BY student_id)
+INSERT INTO student_summary
+    (student_id, latest_period, latest_term_avg, latest_marks, trend_slope, terms,
+     activity_count, pending_count, approved_count, last_activity_date)
+SELECT t.student_id, p.year || ' - ' || p.term, ROUND(p.avg_mark, 2), m.marks,
+       CASE WHEN f.n > 1 THEN ROUND((f.n * f.sxy - f.sx * f.sy) / (f.n * f.sxx - f.sx * f.sx), 3) END,
+       COALESCE(f.n, 0), COALESCE(a.total, 0), COALESCE(a.pending, 0), COALESCE(a.approved, 0), a.last_date
+FROM target t
+LEFT JOIN fit f ON f.student_id = t.student_id
+LEFT JOIN periods p ON p.student_id = t.student_id AND p.x = f.last_x
+LEFT JOIN latest_marks m ON m.student_id = t.student_id
+LEFT JOIN acts a ON a.student_id = t.student_id
+'''
+
+# Student ids per refresh statement (stays under SQLite's bound-parameter limit)
+SUMMARY_BATCH = 500
+
+# grades_version bumps remembered with the students they touched (see grades_changed_since)
+GRADE_CHANGE_LOG = 256
+
+# Users per page in the admin User Management roster
+ROSTER_PAGE_SIZE = 25
+
+# Excel's hard sheet limit (header row included); larger tables spill onto "<name>_2", "<name>_3", ...
+EXCEL_MAX_ROWS = 1048576
+
+EXPORT_SHEETS = [
+    ('Users', "SELECT student_id, role, name FROM users"),
+    ('Academic_Grades', "SELECT * FROM grades"),
+    ('Portfolio_Activities', "SELECT * FROM activities"),
+]
+
+
+def _hash_passwords(passwords):
+    """Process-pool worker: bcrypt-hashes a batch of plain-text passwords."""
+    return [bcrypt.hashpw(p.encode(), bcrypt.gensalt()) for p in passwords]
+
+
+class ConnectionPool:
+    """Bounded pool of SQLite connections shared by all Streamlit sessions.
+
+    Connections are created lazily up to ``size`` and handed back out instead
+    of being reopened on every query. A thread that already holds a connection
+    gets the same one back, so nested calls share a single transaction.
+    ``on_write`` is called whenever a checked-out connection changed any rows.
+    """
+
+    # Applied to every new connection; journal_mode is persistent on the file
+    # and only needs to be switched once.
+    PRAGMAS = (
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA cache_size=-16000",
+        "PRAGMA mmap_size=134217728",
+    )
+
+    def __init__(self, db_path, size=8, timeout=30.0, on_write=None):
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self.on_write = on_write
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._created = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        with self._lock:
+            conn = self._connect()
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._idle.put(conn)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=self.timeout)
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        self._created += 1
+        return conn
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                return self._connect()
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError("Timed out waiting for a pooled database connection.")
+
+    def _release(self, conn):
+        conn.row_factory = None
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Checks out a connection and commits (or rolls back) when the block exits."""
+        held = getattr(self._local, 'conn', None)
+        if held is not None:
+            yield held
+            return
+
+        conn = self._acquire()
+        self._local.conn = conn
+        changes = conn.total_changes
+        try:
+            with conn:
+                yield conn
+        finally:
+            self._local.conn = None
+            wrote = conn.total_changes != changes
+            self._release(conn)
+            if wrote and self.on_write:
+                self.on_write()
+
+    def close(self):
+        """Closes every idle connection (used on shutdown and in benchmarks)."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._created = 0
 
 
 class DatabaseManager:
-    def __init__(self, db_path):
+    def __init__(self, db_path, pool_size=8, cache=None):
         self.db_path = db_path
+        self.cache = cache or QueryCache()
+        # Monotonic counter bumped after every committed write (any method, or raw SQL
+        # run through _get_connection); caches compare against it to know they are stale.
+        self.data_version = 0
+        # Bumped only by the methods that write grades (update_grade, bulk_upsert_grades,
+        # delete_user), so grade-derived caches survive activity and user writes.
+        self.grades_version = 0
+        self._grade_changes = deque(maxlen=GRADE_CHANGE_LOG)
+        self._version_lock = threading.Lock()
+        self._export_cache = None
+        self._export_lock = threading.Lock()
+        self.pool = ConnectionPool(db_path, size=pool_size, on_write=self._bump_version)
         self._init_db()
 
+    def _bump_version(self):
+        with self._version_lock:
+            self.data_version += 1
+
+    def _bump_grades_version(self, sids):
+        with self._version_lock:
+            self.grades_version += 1
+            self._grade_changes.append((self.grades_version, frozenset(sids)))
+
+    def grades_changed_since(self, version):
+        """Students whose grades were written after ``version``; None once that is too far back to tell."""
+        with self._version_lock:
+            if version == self.grades_version:
+                return set()
+            if not self._grade_changes or self._grade_changes[0][0] > version + 1:
+                return None
+            return set().union(*(sids for v, sids in self._grade_changes if v > version))
+
     def _get_connection(self):
-        """Returns a connection object to the SQLite database."""
-        return sqlite3.connect(self.db_path, check_same_thread=False)
+        """Returns a pooled connection as a context manager; commits on a clean exit."""
+        return self.pool.connection()
 
     def _init_db(self):
         """Initializes schema and auto-migrates existing tables to add missing columns."""
@@ -56,26 +258,79 @@ class DatabaseManager:
             migrations = [
                 ('status', "TEXT DEFAULT 'pending'"),
                 ('grade_section', "TEXT"),
-                ('file_path', "TEXT")
+                ('file_path', "TEXT"),
+                ('thumb_small', "TEXT"),
+                ('thumb_large', "TEXT")
             ]
             
             for col_name, col_type in migrations:
                 if col_name not in columns:
                     conn.execute(f"ALTER TABLE activities ADD COLUMN {col_name} {col_type}")
-            
-            # 5. Default Admin Creation (admin / admin123)
+
+            # 4b. Evidence blob reference counts (content-addressed store, see PortfolioManager)
+            conn.execute('''CREATE TABLE IF NOT EXISTS evidence_blobs
+                (digest TEXT PRIMARY KEY,
+                 path TEXT,
+                 size INTEGER,
+                 refs INTEGER)''')
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_evidence_blobs_path ON evidence_blobs (path)")
+
+            # 4c. AI admin insights, one row per student (same three columns test.py added to activities)
+            conn.execute('''CREATE TABLE IF NOT EXISTS student_insights
+                (student_id TEXT PRIMARY KEY,
+                 future_perspective TEXT,
+                 areas_to_improve TEXT,
+                 help_needed TEXT,
+                 fingerprint TEXT,
+                 generated_at TEXT)''')
+
+            # 4d. Materialized per-student standing, kept current by every write method
+            conn.execute('''CREATE TABLE IF NOT EXISTS student_summary
+                (student_id TEXT PRIMARY KEY,
+                 latest_period TEXT,
+                 latest_term_avg REAL,
+                 latest_marks TEXT,
+                 trend_slope REAL,
+                 terms INTEGER,
+                 activity_count INTEGER,
+                 pending_count INTEGER,
+                 approved_count INTEGER,
+                 last_activity_date TEXT)''')
+
+            # 5. Indexes & unique grade key
+            # Older databases may hold several rows for the same grade slot; keep the newest
+            # one before the unique index is created, otherwise CREATE UNIQUE INDEX fails.
+            has_grade_key = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='index' AND name='ux_grades_slot'").fetchone()
+            if not has_grade_key:
+                conn.execute('''DELETE FROM grades WHERE rowid NOT IN
+                                (SELECT MAX(rowid) FROM grades GROUP BY student_id, year, term, subject)''')
+            conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_grades_slot ON grades (student_id, year, term, subject)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_activities_student_date ON activities (student_id, date)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_activities_status_date ON activities (status, date)")
+            # Roster search: case-insensitive ID / name prefixes and role-filtered pages
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_users_id_nocase ON users (student_id COLLATE NOCASE)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_users_name_nocase ON users (name COLLATE NOCASE)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_users_role ON users (role, student_id)")
+
+            # 6. Default Admin Creation (admin / admin123)
             admin_check = conn.execute("SELECT * FROM users WHERE role='Admin'").fetchone()
             if not admin_check:
                 hashed = bcrypt.hashpw("admin123".encode(), bcrypt.gensalt())
                 conn.execute("INSERT INTO users VALUES (?,?,?,?)", ("admin", hashed, "Admin", "System Administrator"))
+
+            # 7. First run with an existing database: fill the summary table in bulk
+            if not conn.execute("SELECT 1 FROM student_summary LIMIT 1").fetchone():
+                self._refresh_summaries(conn)
             
             conn.commit()
 
     # --- AUTHENTICATION ---
     def verify_login(self, sid, pwd):
         with self._get_connection() as conn:
-            conn.row_factory = sqlite3.Row
-            user = conn.execute("SELECT * FROM users WHERE student_id=?", (sid,)).fetchone()
+            cur = conn.cursor()
+            cur.row_factory = sqlite3.Row
+            user = cur.execute("SELECT * FROM users WHERE student_id=?", (sid,)).fetchone()
             if user and bcrypt.checkpw(pwd.encode(), user['password']):
                 return user
         return None
@@ -87,11 +342,75 @@ class DatabaseManager:
             with self._get_connection() as conn:
                 conn.execute("INSERT INTO users (student_id, password, role, name) VALUES (?,?,?,?)", 
                              (sid, hashed, role, name))
+                self._refresh_summaries(conn, [sid])
                 conn.commit()
+            self.cache.invalidate(('roster',), ('summaries',))
             return True, "User created successfully!"
         except sqlite3.IntegrityError:
             return False, "User ID already exists."
 
+    def bulk_create_users(self, df, workers=None, batch_size=32, progress=None):
+        """
+        Creates every user in a (student_id, password, role, name) DataFrame.
+
+        Passwords are hashed in a process pool sized to the available cores and all
+        rows are inserted in one transaction. IDs that already exist (in the database
+        or earlier in the file) are skipped and listed under 'duplicates'; rows with
+        missing fields are listed in the 'errors' DataFrame ('row' = CSV line number).
+        ``progress(done, total)`` is called as each hashing batch finishes.
+        """
+        missing = [c for c in ('student_id', 'password', 'name') if c not in df.columns]
+        if missing:
+            raise ValueError(f"Missing required columns: {', '.join(missing)}")
+
+        clean = pd.DataFrame({
+            'row': range(2, len(df) + 2),
+            'student_id': df['student_id'].astype('string').str.strip().values,
+            'password': df['password'].astype('string').values,
+            'role': (df['role'].astype('string').str.strip().values if 'role' in df.columns else pd.NA),
+            'name': df['name'].astype('string').str.strip().values,
+        })
+        clean['role'] = clean['role'].fillna('Student').replace('', 'Student')
+
+        bad = (clean['student_id'].isna() | (clean['student_id'] == '') |
+               clean['password'].isna() | (clean['password'] == '') | clean['name'].isna())
+        errors = clean.loc[bad, ['row', 'student_id']].assign(error="missing student_id, password or name")
+        clean = clean[~bad]
+
+        # Skip duplicates before hashing so no bcrypt time is spent on rows that can't be inserted
+        with self._get_connection() as conn:
+            existing = {row[0] for row in conn.execute("SELECT student_id FROM users")}
+        dup_mask = clean['student_id'].isin(existing) | clean['student_id'].duplicated()
+        duplicates = clean.loc[dup_mask, 'student_id'].tolist()
+        clean = clean[~dup_mask]
+
+        passwords = clean['password'].tolist()
+        batches = [passwords[i:i + batch_size] for i in range(0, len(passwords), batch_size)]
+        hashes = [None] * len(batches)
+        done = 0
+        if batches:
+            workers = workers or os.cpu_count() or 1
+            # 'spawn' avoids forking the multi-threaded Streamlit server process
+            ctx = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=min(workers, len(batches)), mp_context=ctx) as pool:
+                futures = {pool.submit(_hash_passwords, batch): i for i, batch in enumerate(batches)}
+                for future in as_completed(futures):
+                    hashes[futures[future]] = future.result()
+                    done += len(batches[futures[future]])
+                    if progress:
+                        progress(done, len(passwords))
+
+        hashed = [h for batch in hashes for h in batch]
+        records = list(zip(clean['student_id'].tolist(), hashed, clean['role'].tolist(), clean['name'].tolist()))
+        with self._get_connection() as conn:
+            created = conn.executemany("INSERT OR IGNORE INTO users (student_id, password, role, name) VALUES (?,?,?,?)",
+                                       records).rowcount
+            self._refresh_summaries(conn, [r[0] for r in records])
+            conn.commit()
+        self.cache.invalidate(('roster',), ('summaries',))
+
+        return {'created': created, 'duplicates': duplicates, 'errors': errors.reset_index(drop=True)}
+
     def reset_password(self, sid, new_password):
         """Updates a user's password with a new hashed version."""
         hashed = bcrypt.hashpw(new_password.encode(), bcrypt.gensalt())
@@ -105,33 +424,302 @@ class DatabaseManager:
             return False, str(e)
 
     # --- PORTFOLIO & APPROVAL ---
-    def save_activity(self, sid, title, summary, skills, path=None, status='pending'):
-        """Saves project to portfolio."""
+    def save_activity(self, sid, title, summary, skills, path=None, status='pending', grade_section=None,
+                      thumbnails=None):
+        """Saves project to portfolio and returns the new activity id. ``thumbnails`` as from save_evidence."""
+        date_str = datetime.now().strftime("%Y-%m-%d")
+        thumbnails = thumbnails or {}
+        with self._get_connection() as conn:
+            cur = conn.execute('''INSERT INTO activities (student_id, title, summary, skills, date, file_path, status, grade_section,
+                                                         thumb_small, thumb_large) 
+                            VALUES (?,?,?,?,?,?,?,?,?,?)''', (sid, title, summary, skills, date_str, path, status, grade_section,
+                                                        thumbnails.get('small'), thumbnails.get('large')))
+            if path:
+                # Same transaction as the insert: a failed save never leaves a dangling reference
+                self._acquire_blob(conn, path)
+            self._refresh_summaries(conn, [sid])
+            conn.commit()
+        self._invalidate_activities(sid)
+        return cur.lastrowid
+
+    def tag_event(self, student_ids, title, summary, skills, grade_section=None, status='pending'):
+        """Adds the same event to many portfolios in one transaction and returns the new activity ids."""
+        student_ids = list(dict.fromkeys(student_ids))
+        if not student_ids:
+            return []
         date_str = datetime.now().strftime("%Y-%m-%d")
+        rows = [(sid, title, summary, skills, date_str, None, status, grade_section) for sid in student_ids]
         with self._get_connection() as conn:
-            conn.execute('''INSERT INTO activities (student_id, title, summary, skills, date, file_path, status) 
-                            VALUES (?,?,?,?,?,?,?)''', (sid, title, summary, skills, date_str, path, status))
+            conn.executemany('''INSERT INTO activities (student_id, title, summary, skills, date, file_path, status, grade_section)
+                                VALUES (?,?,?,?,?,?,?,?)''', rows)
+            # The whole batch runs under one write lock, so the AUTOINCREMENT ids are contiguous
+            last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+            self._refresh_summaries(conn, student_ids)
             conn.commit()
+        self._invalidate_activities(*student_ids)
+        return list(range(last_id - len(rows) + 1, last_id + 1))
 
-    def update_activity_status(self, student_id, title, date, new_status):
+    def update_activity_status(self, activity_id, new_status):
         """Moves an item from 'pending' (Audit) to 'approved' (Gallery)."""
         with self._get_connection() as conn:
-            conn.execute("UPDATE activities SET status=? WHERE student_id=? AND title=? AND date=?", 
-                         (new_status, student_id, title, date))
+            owners = conn.execute("UPDATE activities SET status=? WHERE id=? RETURNING student_id",
+                                  (new_status, activity_id)).fetchall()
+            self._refresh_summaries(conn, [row[0] for row in owners])
+            conn.commit()
+        self._invalidate_activities(*[row[0] for row in owners])
+
+    def update_activity(self, activity_id, **fields):
+        """Updates the given columns (title, summary, skills, grade_section, status) of one activity."""
+        unknown = set(fields) - ACTIVITY_EDITABLE_COLUMNS
+        if unknown:
+            raise ValueError(f"Cannot update activity columns: {', '.join(sorted(unknown))}")
+        if not fields:
+            return
+        assignments = ", ".join(f"{col}=?" for col in fields)
+        with self._get_connection() as conn:
+            owners = conn.execute(f"UPDATE activities SET {assignments} WHERE id=? RETURNING student_id",
+                                  (*fields.values(), activity_id)).fetchall()
+            if 'status' in fields:
+                self._refresh_summaries(conn, [row[0] for row in owners])
+            conn.commit()
+        self._invalidate_activities(*[row[0] for row in owners])
+
+    def delete_activity(self, activity_id, sid=None):
+        """Deletes one activity by id; pass ``sid`` to only allow deleting that student's own entry."""
+        with self._get_connection() as conn:
+            if sid is None:
+                owners = conn.execute("DELETE FROM activities WHERE id=? RETURNING student_id, file_path",
+                                      (activity_id,)).fetchall()
+            else:
+                owners = conn.execute("DELETE FROM activities WHERE id=? AND student_id=? RETURNING student_id, file_path",
+                                      (activity_id, sid)).fetchall()
+            orphans = self._release_blobs(conn, [row[1] for row in owners])
+            self._refresh_summaries(conn, [row[0] for row in owners])
             conn.commit()
+        self._remove_orphans(orphans)
+        self._invalidate_activities(*[row[0] for row in owners])
 
-    def delete_activity(self, sid, title, date):
+    # --- EVIDENCE STORAGE ---
+    def blob_path(self, digest):
+        """Where content with this sha256 is already stored, or None. Takes no reference."""
         with self._get_connection() as conn:
-            conn.execute("DELETE FROM activities WHERE student_id=? AND title=? AND date=?", (sid, title, date))
+            row = conn.execute("SELECT path FROM evidence_blobs WHERE digest=?", (digest,)).fetchone()
+        return row[0] if row else None
+
+    def _acquire_blob(self, conn, path):
+        """
+        Adds a reference to a stored evidence file inside the caller's transaction. Store
+        paths are named <sha256>.<ext> (see PortfolioManager.object_path). Raises
+        FileNotFoundError, rolling the caller back, if the file was removed in the meantime.
+        """
+        if conn.execute("UPDATE evidence_blobs SET refs=refs+1 WHERE path=? RETURNING refs", (path,)).fetchone():
+            return
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Evidence file {path} is no longer stored; please upload it again.")
+        digest = os.path.splitext(os.path.basename(path))[0]
+        conn.execute('''INSERT INTO evidence_blobs (digest, path, size, refs) VALUES (?,?,?,1)
+                        ON CONFLICT (digest) DO UPDATE SET refs=refs+1''', (digest, path, os.path.getsize(path)))
+
+    def _release_blobs(self, conn, paths):
+        """
+        Drops one reference per path inside the caller's transaction and returns the paths
+        nobody references any more. Paths not in evidence_blobs (pre-dedup uploads) are left
+        alone. Pass the result to _remove_orphans once the transaction has committed.
+        """
+        orphans = []
+        for path in paths:
+            if not path:
+                continue
+            row = conn.execute("UPDATE evidence_blobs SET refs=refs-1 WHERE path=? RETURNING refs", (path,)).fetchone()
+            if row is None or row[0] > 0:
+                continue
+            conn.execute("DELETE FROM evidence_blobs WHERE path=?", (path,))
+            orphans.append(path)
+        return orphans
+
+    def _remove_orphans(self, paths):
+        """
+        Deletes the files (and thumbnails) of committed-orphaned blobs. Each path is checked
+        again under the write lock, so an upload of the same content that took a new reference
+        after our commit keeps its file.
+        """
+        if not paths:
+            return
+        with self._get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for path in paths:
+                if conn.execute("SELECT 1 FROM evidence_blobs WHERE path=?", (path,)).fetchone():
+                    continue
+                for orphan in [path] + [thumbnail_path(path, px) for px in THUMBNAIL_SIZES.values()]:
+                    if os.path.exists(orphan):
+                        os.remove(orphan)
+
+    def get_storage_stats(self):
+        """Unique objects, references and bytes saved by evidence deduplication."""
+        with self._get_connection() as conn:
+            objects, refs, stored, logical = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(refs), 0), COALESCE(SUM(size), 0), COALESCE(SUM(size * refs), 0) "
+                "FROM evidence_blobs").fetchone()
+        return {'objects': objects, 'references': refs, 'stored_bytes': stored,
+                'logical_bytes': logical, 'saved_bytes': logical - stored}
+
+    # --- STUDENT SUMMARY ---
+    def _refresh_summaries(self, conn, sids=None):
+        """
+        Recomputes student_summary rows inside the caller's transaction: only ``sids``,
+        or every student when None (the bulk rebuild). Each refresh reads just those
+        students' grades and activities through the per-student indexes.
+        """
+        if sids is None:
+            conn.execute("DELETE FROM student_summary")
+            conn.execute(SUMMARY_REFRESH_SQL.format(target=""))
+            return
+        sids = list(dict.fromkeys(sids))
+        for start in range(0, len(sids), SUMMARY_BATCH):
+            batch = sids[start:start + SUMMARY_BATCH]
+            marks = ','.join('?' * len(batch))
+            conn.execute(f"DELETE FROM student_summary WHERE student_id IN ({marks})", batch)
+            conn.execute(SUMMARY_REFRESH_SQL.format(target=f"AND student_id IN ({marks})"), batch)
+
+    def rebuild_student_summary(self):
+        """Regenerates the whole student_summary table in one set-based pass; returns the row count."""
+        with self._get_connection() as conn:
+            self._refresh_summaries(conn)
+            count = conn.execute("SELECT COUNT(*) FROM student_summary").fetchone()[0]
             conn.commit()
+        self.cache.invalidate(('summaries',))
+        return count
+
+    def get_student_summaries(self):
+        """One row per student (joined with their name); latest_marks is a {subject: mark} JSON object."""
+        def load():
+            with self._get_connection() as conn:
+                return pd.read_sql('''SELECT s.*, u.name FROM student_summary s
+                                      JOIN users u ON u.student_id = s.student_id ORDER BY s.student_id''', conn)
+        return self.cache.get_or_load(('summaries',), load)
+
+    def get_student_summary(self, sid):
+        """The summary row for one student as a dict, or None."""
+        def load():
+            with self._get_connection() as conn:
+                cur = conn.cursor()
+                cur.row_factory = sqlite3.Row
+                row = cur.execute("SELECT * FROM student_summary WHERE student_id=?", (sid,)).fetchone()
+                return dict(row) if row else None
+        return self.cache.get_or_load(('summaries', sid), load)
 
     # --- DATA RETRIEVAL ---
+    # Reads go through self.cache; every write method above/below invalidates the keys it touches:
+    # ('profile', sid) per student, ('status', ...) for the audit/gallery lists, ('roster',) for users,
+    # ('summaries',) for the student_summary table.
+    def _invalidate_activities(self, *sids):
+        if sids:
+            self.cache.invalidate(('status',), ('sections',), ('summaries',), *[('profile', sid) for sid in sids])
+
+    def get_students(self):
+        """Student roster (student_id, name) used by the admin selectors."""
+        def load():
+            with self._get_connection() as conn:
+                return pd.read_sql("SELECT student_id, name FROM users WHERE role='Student'", conn)
+        return self.cache.get_or_load(('roster',), load)
+
+    def get_user_page(self, limit=ROSTER_PAGE_SIZE, cursor=None, search=None, role=None):
+        """
+        One page of the user roster ordered by student_id, using a keyset cursor on student_id.
+
+        ``search`` matches the start of the ID or of the name, case-insensitively, and ``role``
+        keeps one role. Returns (DataFrame, next_cursor, total matches); next_cursor is None
+        on the last page.
+        """
+        search = (search or "").strip()
+        clauses, params = [], []
+        if search:
+            # [prefix, prefix + highest code point) under NOCASE is "starts with" as an index range scan
+            clauses.append("(student_id COLLATE NOCASE >= ? AND student_id COLLATE NOCASE < ?"
+                           " OR name COLLATE NOCASE >= ? AND name COLLATE NOCASE < ?)")
+            params += [search, search + "\U0010ffff"] * 2
+        if role:
+            clauses.append("role=?")
+            params.append(role)
+        filters = ' AND '.join(clauses) or "1"
+        sql = f"SELECT student_id, role, name FROM users WHERE {filters} AND student_id > ? ORDER BY student_id LIMIT ?"
+
+        def load():
+            with self._get_connection() as conn:
+                total = conn.execute(f"SELECT COUNT(*) FROM users WHERE {filters}", params).fetchone()[0]
+                # One extra row tells us whether another page exists
+                return pd.read_sql(sql, conn, params=(*params, cursor or "", limit + 1)), total
+
+        page, total = self.cache.get_or_load(('roster', 'page', limit, cursor, search, role), load)
+        next_cursor = None
+        if len(page) > limit:
+            page = page.iloc[:limit]
+            next_cursor = page.iloc[-1]['student_id']
+        return page, next_cursor, total
+
     def get_student_profile(self, sid):
+        return self.cache.get_or_load(('profile', sid), lambda: self.read_student_profile(sid))
+
+    def read_student_profile(self, sid):
+        """(grades, activities) straight from the database, bypassing the query cache (for batch jobs)."""
         with self._get_connection() as conn:
             grades = pd.read_sql("SELECT * FROM grades WHERE student_id=?", conn, params=(sid,))
             activities = pd.read_sql("SELECT * FROM activities WHERE student_id=? ORDER BY date DESC", conn, params=(sid,))
             return grades, activities
 
+    def get_activity_page(self, status, limit=20, cursor=None, student_id=None, grade_section=None,
+                          date_from=None, date_to=None):
+        """
+        One page of activities with ``status``, newest first, using a keyset cursor on (date, id).
+
+        Returns (DataFrame, next_cursor); pass next_cursor back to get the following page,
+        it is None on the last page. Only the columns shown on the audit/gallery cards are read.
+        """
+        clauses, params = ["status=?"], [status]
+        if student_id:
+            clauses.append("student_id=?")
+            params.append(student_id)
+        if grade_section:
+            clauses.append("grade_section=?")
+            params.append(grade_section)
+        if date_from:
+            clauses.append("date>=?")
+            params.append(str(date_from))
+        if date_to:
+            clauses.append("date<=?")
+            params.append(str(date_to))
+        if cursor:
+            clauses.append("(date, id) < (?, ?)")
+            params.extend(cursor)
+        sql = (f"SELECT {', '.join(ACTIVITY_CARD_COLUMNS)} FROM activities WHERE {' AND '.join(clauses)} "
+               f"ORDER BY date DESC, id DESC LIMIT ?")
+
+        def load():
+            with self._get_connection() as conn:
+                # One extra row tells us whether another page exists
+                return pd.read_sql(sql, conn, params=(*params, limit + 1))
+
+        key = ('status', status, 'page', limit, cursor, student_id, grade_section, str(date_from), str(date_to))
+        page = self.cache.get_or_load(key, load)
+        next_cursor = None
+        if len(page) > limit:
+            page = page.iloc[:limit]
+            last = page.iloc[-1]
+            next_cursor = (last['date'], int(last['id']))
+        return page, next_cursor
+
+    def get_grade_sections(self):
+        """Distinct grade sections that activities are tagged with."""
+        def load():
+            with self._get_connection() as conn:
+                return [row[0] for row in conn.execute(
+                    "SELECT DISTINCT grade_section FROM activities WHERE grade_section IS NOT NULL ORDER BY grade_section")]
+        return self.cache.get_or_load(('sections',), load)
+
+    def cache_stats(self):
+        """Hit/miss counters and memory use of the query cache."""
+        return self.cache.stats()
+
     def get_all_data_for_export(self):
         with self._get_connection() as conn:
             users = pd.read_sql("SELECT student_id, role, name FROM users", conn)
@@ -140,55 +728,206 @@ class DatabaseManager:
             return users, grades, activities
 
     # --- BACKUP & EXPORT ---
-    def export_to_excel(self):
-        """Generates an Excel file (in-memory) with all database tables."""
-        users, grades, activities = self.get_all_data_for_export()
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            users.to_excel(writer, sheet_name='Users', index=False)
-            grades.to_excel(writer, sheet_name='Academic_Grades', index=False)
-            activities.to_excel(writer, sheet_name='Portfolio_Activities', index=False)
-        return output.getvalue()
+    def export_to_excel(self, path=None, chunk_size=5000):
+        """
+        Streams every table into an .xlsx file on disk and returns its path.
+
+        Rows are read with fetchmany() and written with xlsxwriter's constant_memory
+        mode, so only one chunk of rows is held in memory at any time.
+        """
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix="school_backup_", suffix=".xlsx")
+            os.close(fd)
+
+        workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+        header_fmt = workbook.add_format({'bold': True})
+        with self._get_connection() as conn:
+            for sheet_name, sql in EXPORT_SHEETS:
+                cursor = conn.execute(sql)
+                header = [col[0] for col in cursor.description]
+                sheet, part, row_idx = None, 1, EXCEL_MAX_ROWS
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        if row_idx >= EXCEL_MAX_ROWS:
+                            sheet = workbook.add_worksheet(sheet_name if part == 1 else f"{sheet_name}_{part}")
+                            sheet.write_row(0, 0, header, header_fmt)
+                            part, row_idx = part + 1, 1
+                        sheet.write_row(row_idx, 0, row)
+                        row_idx += 1
+                if sheet is None:
+                    workbook.add_worksheet(sheet_name).write_row(0, 0, header, header_fmt)
+        workbook.close()
+        return path
+
+    def get_cached_export(self):
+        """
+        Returns the bytes of an Excel backup that matches the current data_version.
+        The workbook is only rebuilt after a write; otherwise the previous file is reused.
+        It is read under the same lock that replaces it, so removing a stale workbook can
+        never pull the file out from under another session's download.
+        """
+        with self._export_lock:
+            version = self.data_version
+            if not (self._export_cache and self._export_cache[0] == version and os.path.exists(self._export_cache[1])):
+                path = self.export_to_excel()
+                if self._export_cache and os.path.exists(self._export_cache[1]):
+                    os.remove(self._export_cache[1])
+                self._export_cache = (version, path)
+            with open(self._export_cache[1], "rb") as export_file:
+                return export_file.read()
 
     # --- GRADE MANAGEMENT ---
     def update_grade(self, sid, year, term, subject, mark):
+        """Inserts a mark or overwrites the existing one for the same student/year/term/subject."""
         with self._get_connection() as conn:
-            exists = conn.execute('''SELECT 1 FROM grades WHERE student_id=? AND year=? AND term=? AND subject=?''', 
-                                 (sid, year, term, subject)).fetchone()
-            if exists:
-                conn.execute('''UPDATE grades SET mark=? WHERE student_id=? AND year=? AND term=? AND subject=?''', 
-                            (mark, sid, year, term, subject))
-            else:
-                conn.execute('''INSERT INTO grades (student_id, year, term, subject, mark) VALUES (?,?,?,?,?)''', 
-                            (sid, year, term, subject, mark))
+            conn.execute(GRADE_UPSERT_SQL, (sid, year, term, subject, mark))
+            self._refresh_summaries(conn, [sid])
+            conn.commit()
+        self._bump_grades_version([sid])
+        self.cache.invalidate(('profile', sid), ('summaries',))
+
+    def bulk_upsert_grades(self, df, chunk_size=5000, progress=None):
+        """
+        Validates a grades DataFrame (student_id, year, term, subject, mark) and upserts
+        every valid row in a single transaction.
+
+        Returns a dict with 'inserted' and 'updated' counts and an 'errors' DataFrame
+        (one row per rejected CSV line; 'row' is the CSV line number, header = line 1).
+        ``progress(done, total)`` is called after each chunk is written.
+        """
+        missing = [c for c in GRADE_COLUMNS if c not in df.columns]
+        if missing:
+            raise ValueError(f"Missing required columns: {', '.join(missing)}")
+
+        # 1. Vectorized coercion
+        clean = pd.DataFrame(index=df.index)
+        for col in ('student_id', 'term', 'subject'):
+            clean[col] = df[col].astype('string').str.strip()
+        clean['year'] = pd.to_numeric(df['year'], errors='coerce')
+        clean['mark'] = pd.to_numeric(df['mark'], errors='coerce')
+
+        with self._get_connection() as conn:
+            known_ids = {row[0] for row in conn.execute("SELECT student_id FROM users")}
+
+        # 2. Vectorized validation; every failing check appends its message to the row
+        checks = [
+            (clean['student_id'].isna() | (clean['student_id'] == ''), "missing student_id"),
+            (clean['student_id'].notna() & (clean['student_id'] != '') & ~clean['student_id'].isin(known_ids),
+             "unknown student_id"),
+            (clean['year'].isna() | (clean['year'] % 1 != 0), "year is not a whole number"),
+            (clean['term'].isna() | (clean['term'] == ''), "missing term"),
+            (clean['subject'].isna() | (clean['subject'] == ''), "missing subject"),
+            (clean['mark'].isna(), "mark is not a number"),
+            (clean['mark'].notna() & (clean['mark'] % 1 != 0), "mark is not a whole number"),
+            (clean['mark'].notna() & ~clean['mark'].between(0, 100), "mark outside 0-100"),
+        ]
+        messages = pd.Series('', index=df.index)
+        for mask, message in checks:
+            mask = mask.fillna(True).astype(bool)
+            messages[mask] = messages[mask] + message + '; '
+        bad = messages != ''
+
+        # The same grade slot twice in one file: the last row wins, earlier ones are reported
+        slot = ['student_id', 'year', 'term', 'subject']
+        repeated = clean[~bad].duplicated(slot, keep='last').reindex(df.index, fill_value=False)
+        messages[repeated] = "duplicate grade slot; a later row for it is used"
+        bad |= repeated
+
+        errors = pd.DataFrame({
+            'row': pd.Series(range(2, len(df) + 2), index=df.index)[bad],
+            'student_id': df.loc[bad, 'student_id'],
+            'error': messages[bad].str.rstrip('; '),
+        }).reset_index(drop=True)
+
+        valid = clean[~bad]
+        records = list(zip(valid['student_id'].astype(str).tolist(), valid['year'].astype(int).tolist(),
+                           valid['term'].astype(str).tolist(), valid['subject'].astype(str).tolist(),
+                           valid['mark'].astype(int).tolist()))
+
+        # 3. One transaction, written in chunks so progress can be reported
+        total = len(records)
+        with self._get_connection() as conn:
+            before = conn.execute("SELECT COUNT(*) FROM grades").fetchone()[0]
+            for start in range(0, total, chunk_size):
+                conn.executemany(GRADE_UPSERT_SQL, records[start:start + chunk_size])
+                if progress:
+                    progress(min(start + chunk_size, total), total)
+            inserted = conn.execute("SELECT COUNT(*) FROM grades").fetchone()[0] - before
+            touched = set(valid['student_id'].astype(str))
+            self._refresh_summaries(conn, touched)
             conn.commit()
+        if records:
+            self._bump_grades_version(touched)
+            self.cache.invalidate(('summaries',), *[('profile', sid) for sid in touched])
+
+        return {'inserted': inserted, 'updated': total - inserted, 'errors': errors}
 
     def delete_user(self, sid):
         """Cascading delete of a student and all related data."""
         with self._get_connection() as conn:
             conn.execute("DELETE FROM users WHERE student_id=?", (sid,))
             conn.execute("DELETE FROM grades WHERE student_id=?", (sid,))
-            conn.execute("DELETE FROM activities WHERE student_id=?", (sid,))
+            conn.execute("DELETE FROM student_insights WHERE student_id=?", (sid,))
+            removed = conn.execute("DELETE FROM activities WHERE student_id=? RETURNING file_path", (sid,)).fetchall()
+            orphans = self._release_blobs(conn, [row[0] for row in removed])
+            self._refresh_summaries(conn, [sid])
             conn.commit()
+        self._remove_orphans(orphans)
+        self._bump_grades_version([sid])
+        self.cache.invalidate(('roster',), ('status',), ('sections',), ('summaries',), ('profile', sid))
 
-            def get_full_portfolio_zip(self, sid):
-             grades, activities = self.get_student_profile(sid)
-        
-        zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, "a", zipfile.ZIP_DEFLATED, False) as zip_file:
-            # 1. Prepare Excel Data
-            excel_buffer = io.BytesIO()
-            with pd.ExcelWriter(excel_buffer, engine='xlsxwriter') as writer:
-                grades.to_excel(writer, sheet_name='Grades', index=False)
-                activities.to_excel(writer, sheet_name='Portfolio', index=False)
-            zip_file.writestr(f"student_{sid}_report.xlsx", excel_buffer.getvalue())
-            
-            # 2. Add Images
-            for _, row in activities.iterrows():
-                path = row.get('file_path')
-                if path and os.path.exists(str(path)):
-                    img_name = os.path.basename(str(path))
-                    with open(str(path), 'rb') as f:
-                        zip_file.writestr(f"images/{img_name}", f.read())
-                        
-        return zip_buffer.getvalue()
\ No newline at end of file
+    # --- AI INSIGHTS ---
+    def get_cohort_ids(self, grade_section=None):
+        """Student ids for the whole school, or those with activities tagged ``grade_section``."""
+        with self._get_connection() as conn:
+            if grade_section is None:
+                rows = conn.execute("SELECT student_id FROM users WHERE role='Student' ORDER BY student_id")
+            else:
+                rows = conn.execute('''SELECT DISTINCT a.student_id FROM activities a
+                                        JOIN users u ON u.student_id = a.student_id
+                                        WHERE a.grade_section=? ORDER BY a.student_id''', (grade_section,))
+            return [row[0] for row in rows]
+
+    def get_insight_fingerprints(self, sids):
+        """{student_id: fingerprint} of the data each stored insight was generated from."""
+        with self._get_connection() as conn:
+            rows = conn.execute(
+                f"SELECT student_id, fingerprint FROM student_insights WHERE student_id IN ({','.join('?' * len(sids))})",
+                list(sids)).fetchall() if sids else []
+        return dict(rows)
+
+    def save_student_insight(self, sid, sections, fingerprint):
+        """Stores the parsed FUTURE PERSPECTIVE / AREAS TO IMPROVE / HELP NEEDED sections for a student."""
+        with self._get_connection() as conn:
+            conn.execute('''INSERT INTO student_insights
+                            (student_id, future_perspective, areas_to_improve, help_needed, fingerprint, generated_at)
+                            VALUES (?,?,?,?,?,?)
+                            ON CONFLICT (student_id) DO UPDATE SET
+                                future_perspective=excluded.future_perspective,
+                                areas_to_improve=excluded.areas_to_improve,
+                                help_needed=excluded.help_needed,
+                                fingerprint=excluded.fingerprint,
+                                generated_at=excluded.generated_at''',
+                         (sid, sections.get('future_perspective'), sections.get('areas_to_improve'),
+                          sections.get('help_needed'), fingerprint, datetime.now().strftime("%Y-%m-%d %H:%M")))
+            conn.commit()
+
+    def get_student_insights(self, sids=None):
+        with self._get_connection() as conn:
+            if sids is None:
+                return pd.read_sql("SELECT * FROM student_insights ORDER BY student_id", conn)
+            return pd.read_sql(
+                f"SELECT * FROM student_insights WHERE student_id IN ({','.join('?' * len(sids))}) ORDER BY student_id",
+                conn, params=list(sids)) if sids else pd.read_sql("SELECT * FROM student_insights WHERE 0", conn)
+
+    # --- PORTFOLIO ARCHIVES ---
+    def get_full_portfolio_zip(self, sid, dest=None):
+        """Writes a student's report and evidence to a ZIP (temp file unless ``dest`` is given) and returns it."""
+        return PortfolioArchiver(self).build_student(sid, dest)
+
+    def get_section_portfolio_zip(self, grade_section, dest=None):
+        """Class-wide archive: one folder per student tagged with ``grade_section``."""
+        return PortfolioArchiver(self).build_section(grade_section, dest)
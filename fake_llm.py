@@ -0,0 +1,120 @@
+"""
+Offline stand-in for the Groq chat client, so the Journalist / Career Mentor flows
+(including streaming and the SAVE_DATA hand-off) can run without network or keys:
+
+    EvidenceInterviewer([], client=FakeStreamingClient())
+
+For load tests, FakeBackend adds latency, token throughput, server errors and 429s
+behind the real key pool, so retries and cooldowns are exercised too:
+
+    EvidenceInterviewer([], backend=FakeBackend(keys=3, latency=0.4, tokens_per_second=250,
+                                                rate_limit_rate=0.05, seed=7))
+"""
+import random
+import threading
+import time
+from types import SimpleNamespace
+import groq
+import httpx
+from llm_backends import GroqBackend
+
+FINAL_REPLY = ("You described building a line-following robot for the regional science fair.\n\n"
+               "SAVE_DATA: Grade 10 | Line-Following Robot | Arduino, C++, Teamwork | "
+               "Designed and programmed a line-following robot that placed second at the regional science fair.")
+QUESTION_REPLY = "What was the hardest technical problem you solved, and how did you solve it?"
+MENTOR_REPLY = ("🔭 FUTURE PERSPECTIVE: Strong fit for engineering roles.\n"
+                "🎯 AREAS TO IMPROVE: Written communication.\n"
+                "🆘 HELP NEEDED: Mentoring for competition preparation.")
+
+
+_REQUEST = httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions")
+
+
+def _error(cls, status, headers=None):
+    """A groq SDK exception as the real client would raise it."""
+    response = httpx.Response(status, headers=headers or {}, request=_REQUEST)
+    return cls(f"Error code: {status} (injected by fake_llm)", response=response, body=None)
+
+
+def _chunk(text=None):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text),
+                                                    message=SimpleNamespace(content=text))])
+
+
+class FakeStreamingClient:
+    """
+    Mimics ``groq.Groq().chat.completions.create`` for both stream=True and stream=False.
+
+    Replies are deterministic: the final interview round (system prompt says the
+    interview is OVER) returns a SAVE_DATA tag, other interview turns return a
+    follow-up question, and roadmap prompts return the three admin sections.
+    ``reply`` overrides this with a fixed string or a callable(messages) -> str.
+
+    Load-test knobs: ``latency`` seconds before the first chunk, ``tokens_per_second``
+    pacing of the stream (about 4 characters per token), and the fraction of requests
+    failing with a 500 (``error_rate``) or a 429 carrying ``retry_after`` (``rate_limit_rate``).
+    """
+
+    def __init__(self, reply=None, chunk_size=6, delay=0.0, latency=0.0, tokens_per_second=None,
+                 error_rate=0.0, rate_limit_rate=0.0, retry_after=1.0, rng=None):
+        self.reply = reply
+        self.chunk_size = chunk_size
+        self.delay = delay
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self.calls = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def _reply_for(self, messages):
+        if callable(self.reply):
+            return self.reply(messages)
+        if self.reply is not None:
+            return self.reply
+        if messages and messages[0]["role"] == "system":
+            return FINAL_REPLY if "interview is OVER" in messages[0]["content"] else QUESTION_REPLY
+        return MENTOR_REPLY
+
+    def _inject_failure(self):
+        with self._lock:
+            roll = self.rng.random()
+        if roll < self.rate_limit_rate:
+            raise _error(groq.RateLimitError, 429, {"retry-after": str(self.retry_after)})
+        if roll < self.rate_limit_rate + self.error_rate:
+            raise _error(groq.InternalServerError, 500)
+
+    def create(self, model=None, messages=None, stream=False, **kwargs):
+        self.calls.append({"model": model, "messages": messages, "stream": stream, **kwargs})
+        self._inject_failure()
+        text = self._reply_for(messages or [])
+        if not stream:
+            time.sleep(self.latency + (len(text) / 4 / self.tokens_per_second if self.tokens_per_second else 0))
+            return _chunk(text)
+        return self._stream(text)
+
+    def _stream(self, text):
+        if self.latency:
+            time.sleep(self.latency)
+        pace = self.chunk_size / 4 / self.tokens_per_second if self.tokens_per_second else 0.0
+        for start in range(0, len(text), self.chunk_size):
+            if self.delay or pace:
+                time.sleep(self.delay + pace)
+            yield _chunk(text[start:start + self.chunk_size])
+        yield _chunk(None)
+
+
+class FakeBackend(GroqBackend):
+    """
+    The Groq backend over ``keys`` FakeStreamingClients, so injected 429s and 500s go
+    through the real groq_pool retry, backoff and cooldown logic. ``seed`` makes the
+    failure pattern reproducible; the remaining arguments go to every client.
+    """
+
+    def __init__(self, keys=2, seed=None, max_attempts=4, **client_kwargs):
+        rng = random.Random(seed)
+        self.clients = [FakeStreamingClient(rng=random.Random(rng.random()), **client_kwargs) for _ in range(keys)]
+        super().__init__(clients=self.clients, max_attempts=max_attempts)
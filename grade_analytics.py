@@ -0,0 +1,247 @@
+"""
+Cohort-wide grade analytics for the admin dashboard.
+
+The grades table is read once into categorical columns and everything else is NumPy
+over integer codes: per-group mark histograms (np.bincount) give counts, pass rates
+and percentiles, and a dense students x subjects x terms array gives term-over-term
+deltas and at-risk flags without any per-student Python loop. Reports are cached per
+DatabaseManager.grades_version and only rebuilt, on request, after a grade write;
+the rebuild reloads only the students whose grades changed.
+"""
+import threading
+import time
+import numpy as np
+import pandas as pd
+
+# The pass line drawn on the Academic Records chart
+PASS_MARK = 50
+TERM_ORDER = ["Term 1", "Term 2", "Term 3", "Term 4"]
+PERCENTILES = (10, 25, 50, 75, 90)
+# A term average this many points below the student's previous term counts as a sharp drop
+DROP_THRESHOLD = 10
+# Marks are whole percentages; histogram buckets 0..100
+_BUCKETS = 101
+# group_concat separator for the text columns: a control character no id or subject contains
+_SEP = "\x1f"
+# Past this many changed students one full reload beats splicing them in
+_MAX_SPLICE = 500
+
+
+def _read_columns(db, student_ids=None):
+    """
+    The five grade columns as five strings. SQLite concatenates each column during one
+    sequential scan, so two million rows reach Python as five values instead of a tuple
+    of five objects per row, which is where pd.read_sql spent most of its time.
+    """
+    where, params = "", []
+    if student_ids is not None:
+        where, params = f"AND student_id IN ({','.join('?' * len(student_ids))})", list(student_ids)
+    with db._get_connection() as conn:
+        return conn.execute(f"""SELECT group_concat(student_id, char(31)), group_concat(subject, char(31)),
+                                       group_concat(term, char(31)), group_concat(CAST(year AS INTEGER)),
+                                       group_concat(mark)
+                                FROM grades WHERE typeof(mark) IN ('integer', 'real') {where}""", params).fetchone()
+
+
+def _term_categories(terms):
+    return TERM_ORDER + sorted(set(terms) - set(TERM_ORDER))
+
+
+def _frame(student_id, subject, term, year, mark):
+    """The loaded grades frame from categorical id/subject/term columns and NumPy year/mark arrays."""
+    g = pd.DataFrame({'student_id': student_id, 'year': year, 'term': term, 'subject': subject, 'mark': mark})
+    g['period_no'] = g['year'] * len(term.categories) + term.codes
+    return g
+
+
+def load_grades(db, student_ids=None):
+    """Every grade row (or ``student_ids``' rows) with categorical ids/terms/subjects and a sortable period number."""
+    ids, subjects, terms, years, marks = _read_columns(db, student_ids)
+    ids, subjects, terms = (np.array(col.split(_SEP) if col else [], dtype=object) for col in (ids, subjects, terms))
+    return _frame(pd.Categorical(ids), pd.Categorical(subjects),
+                  pd.Categorical(terms, categories=_term_categories(pd.unique(terms)), ordered=True),
+                  np.fromstring(years or "", dtype=np.int32, sep=','),
+                  np.fromstring(marks or "", dtype=np.float32, sep=','))
+
+
+def _combine(a, b, categories, ordered=False):
+    codes = np.concatenate([a.cat.set_categories(categories).cat.codes, b.cat.set_categories(categories).cat.codes])
+    return pd.Categorical.from_codes(codes, categories, ordered=ordered)
+
+
+def splice_grades(g, fresh, student_ids):
+    """``g`` with every row of ``student_ids`` replaced by ``fresh`` (their reloaded rows)."""
+    kept = g[~g['student_id'].isin(student_ids)]
+    columns = {}
+    for col in ('student_id', 'subject'):
+        a, b = kept[col].cat.remove_unused_categories(), fresh[col].cat.remove_unused_categories()
+        columns[col] = _combine(a, b, sorted(set(a.cat.categories) | set(b.cat.categories)))
+    terms = _term_categories(set(kept['term'].cat.categories) | set(fresh['term'].cat.categories))
+    columns['term'] = _combine(kept['term'], fresh['term'], terms, ordered=True)
+    return _frame(**columns, year=np.concatenate([kept['year'], fresh['year']]),
+                  mark=np.concatenate([kept['mark'], fresh['mark']]))
+
+
+def _distribution(keys, n_groups, marks):
+    """Count, mean, std, min/max, percentiles and pass rate of ``marks`` per integer group key."""
+    buckets = np.clip(np.rint(marks), 0, 100).astype(np.int64)
+    hist = np.bincount(keys * _BUCKETS + buckets, minlength=n_groups * _BUCKETS).reshape(n_groups, _BUCKETS)
+    count = hist.sum(axis=1)
+    total = np.bincount(keys, weights=marks, minlength=n_groups)
+    squares = np.bincount(keys, weights=marks.astype(np.float64) ** 2, minlength=n_groups)
+    passed = np.bincount(keys, weights=marks >= PASS_MARK, minlength=n_groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / count
+        std = np.sqrt(np.maximum(squares - count * mean ** 2, 0) / (count - 1))
+        stats = {'count': count, 'mean': mean, 'std': std,
+                 'min': (hist > 0).argmax(axis=1), 'max': 100 - (hist[:, ::-1] > 0).argmax(axis=1)}
+        cumulative = hist.cumsum(axis=1)
+        for p in PERCENTILES:
+            # Nearest-rank percentile: first bucket holding the p-th percent of marks
+            stats[f"p{p}"] = (cumulative >= np.ceil(count * p / 100)[:, None]).argmax(axis=1)
+        stats['pass_rate'] = passed / count
+    # Ten-point bands (90-100 inclusive) for the distribution charts
+    bands = hist[:, :100].reshape(n_groups, 10, 10).sum(axis=2)
+    bands[:, 9] += hist[:, 100]
+    return pd.DataFrame(stats).round(3), bands
+
+
+def _period_labels(g, periods):
+    first = g.drop_duplicates('period_no').set_index('period_no')
+    return (first['year'].astype(str) + " - " + first['term'].astype(str)).reindex(periods).values
+
+
+def build_report(g):
+    """Every cohort view the dashboard shows, from one loaded grades frame."""
+    if g.empty:
+        return None
+    students = g['student_id'].cat.categories
+    subjects = g['subject'].cat.categories.astype(str)
+    periods = np.sort(g['period_no'].unique())
+    labels = _period_labels(g, periods)
+    n_s, n_j, n_p = len(students), len(subjects), len(periods)
+
+    s_idx = g['student_id'].cat.codes.to_numpy(np.int64)
+    j_idx = g['subject'].cat.codes.to_numpy(np.int64)
+    p_idx = np.searchsorted(periods, g['period_no'].to_numpy())
+    marks = g['mark'].to_numpy(np.float32)
+
+    by_subject, subject_bands = _distribution(j_idx, n_j, marks)
+    by_subject.insert(0, 'subject', subjects)
+    by_period, _ = _distribution(p_idx, n_p, marks)
+    by_period.insert(0, 'period', labels)
+
+    histogram = pd.DataFrame(subject_bands, index=subjects,
+                             columns=[f"{b * 10}-{b * 10 + 9 if b < 9 else 100}" for b in range(10)])
+    histogram = histogram.rename_axis('subject').reset_index().melt('subject', var_name='band', value_name='marks')
+
+    trend_count = np.bincount(p_idx * n_j + j_idx, minlength=n_p * n_j)
+    trend_sum = np.bincount(p_idx * n_j + j_idx, weights=marks, minlength=n_p * n_j)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        trend_mean = (trend_sum / trend_count).reshape(n_p, n_j)
+    trend = pd.DataFrame(trend_mean, index=labels, columns=subjects).rename_axis('period').reset_index() \
+        .melt('period', var_name='subject', value_name='mark').dropna().round(1)
+
+    # Dense students x subjects x periods cube; a missing mark is NaN
+    cube = np.full((n_s, n_j, n_p), np.nan, dtype=np.float32)
+    cube[s_idx, j_idx, p_idx] = marks
+
+    # Term-over-term change for students with a mark in both consecutive terms
+    step = cube[:, :, 1:] - cube[:, :, :-1]
+    step_count = (~np.isnan(step)).sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        step_mean = np.where(step_count > 0, np.nansum(step, axis=0) / step_count, np.nan)
+    deltas = pd.DataFrame({
+        'subject': np.repeat(subjects, n_p - 1),
+        'period': np.tile(labels[1:], n_j),
+        'mean_delta': step_mean.ravel().round(2),
+        'count': step_count.ravel(),
+    }).query("count > 0")
+
+    return {
+        'students': n_s,
+        'records': len(g),
+        'subjects': n_j,
+        'pass_rate': round(float((marks >= PASS_MARK).mean()), 3),
+        'by_subject': by_subject,
+        'by_period': by_period,
+        'histogram': histogram,
+        'trend': trend,
+        'deltas': deltas.reset_index(drop=True),
+        'at_risk': _at_risk(cube, students, subjects, labels),
+    }
+
+
+def _at_risk(cube, students, subjects, labels):
+    """
+    Students whose latest term average is below PASS_MARK, who fail any subject in
+    their latest term, or whose term average fell DROP_THRESHOLD+ points since their
+    previous term. Worst averages first.
+    """
+    n_s, _, n_p = cube.shape
+    present = ~np.isnan(cube)
+    counts = present.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        term_avg = np.where(present, cube, 0).sum(axis=1) / counts
+    rows = np.arange(n_s)
+    has_term = counts > 0
+    latest = n_p - 1 - has_term[:, ::-1].argmax(axis=1)
+
+    earlier = has_term & (np.arange(n_p) < latest[:, None])
+    has_prev = earlier.any(axis=1)
+    prev = n_p - 1 - earlier[:, ::-1].argmax(axis=1)
+
+    latest_marks = cube[rows, :, latest]
+    latest_avg = term_avg[rows, latest]
+    change = np.where(has_prev, latest_avg - term_avg[rows, prev], np.nan)
+    failing = (latest_marks < PASS_MARK).sum(axis=1)
+    worst = np.where(np.isnan(latest_marks), np.inf, latest_marks).argmin(axis=1)
+
+    flagged = (latest_avg < PASS_MARK) | (failing > 0) | (change <= -DROP_THRESHOLD)
+    result = pd.DataFrame({
+        'student_id': np.asarray(students, dtype=str)[flagged],
+        'latest_term': labels[latest[flagged]],
+        'average': latest_avg[flagged].round(1),
+        'change': change[flagged].round(1),
+        'failing_subjects': failing[flagged],
+        'worst_subject': np.asarray(subjects)[worst[flagged]],
+        'worst_mark': latest_marks[rows[flagged], worst[flagged]],
+    })
+    return result.sort_values('average').reset_index(drop=True)
+
+
+class CohortAnalytics:
+    """
+    Holds the last cohort report and rebuilds it only on request, and only when
+    DatabaseManager.grades_version moved (a grade write), so activity and user writes
+    never trigger a reload of the grades table. The loaded grades are kept too, so a
+    rebuild re-reads just the students written since (DatabaseManager.grades_changed_since).
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._lock = threading.Lock()
+        self._version = None
+        self._report = None
+        self._grades = None
+
+    def latest(self):
+        """(last built report or None, whether grades changed since it was built); never builds."""
+        return self._report, self._version != self.db.grades_version
+
+    def report(self):
+        """Returns (report, seconds spent building it; 0.0 when served from cache)."""
+        with self._lock:
+            # Read before loading: a write that lands mid-build leaves the report stale
+            version = self.db.grades_version
+            if version == self._version:
+                return self._report, 0.0
+            started = time.perf_counter()
+            changed = None if self._grades is None else self.db.grades_changed_since(self._version)
+            if changed is None or len(changed) > _MAX_SPLICE:
+                self._grades = load_grades(self.db)
+            else:
+                self._grades = splice_grades(self._grades, load_grades(self.db, changed), changed)
+            self._report = build_report(self._grades)
+            self._version = version
+            return self._report, time.perf_counter() - started
@@ -0,0 +1,224 @@
+import re
+import threading
+import time
+import groq
+from tenacity import Retrying, retry_if_exception_type, stop_after_attempt, wait_random_exponential
+
+# Seconds a key sits out after a 429 that carried no usable reset header
+DEFAULT_COOLDOWN = 5.0
+# If every key is parked for longer than this, fail the turn at once rather than keep the student waiting
+MAX_WAIT_FOR_KEY = 10.0
+# A key that fails authentication is parked for this long instead of being retried every turn
+AUTH_FAILURE_COOLDOWN = 15 * 60.0
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+
+class LLMUnavailableError(Exception):
+    """Raised when every key is rate-limited or failing and the retry budget is spent, or the API rejects the request."""
+
+
+def parse_duration(value):
+    """Parses Groq reset headers such as '7.66s', '2m59.56s', '1h2m' or '250ms' into seconds."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION.findall(value)
+    if not parts:
+        return None
+    scale = {'h': 3600, 'm': 60, 's': 1, 'ms': 0.001}
+    return sum(float(num) * scale[unit] for num, unit in parts)
+
+
+class _AllCoolingDown(Exception):
+    """Every key is parked; ``wait`` is how long until the first one is usable again."""
+
+    def __init__(self, wait):
+        super().__init__(f"all keys rate-limited for another {wait:.1f}s")
+        self.wait = wait
+
+
+class _wait_for_keys:
+    """Tenacity wait: jittered backoff, but never shorter than the time until a key frees up."""
+
+    def __init__(self, backoff):
+        self.backoff = backoff
+
+    def __call__(self, retry_state):
+        wait = self.backoff(retry_state)
+        error = retry_state.outcome.exception() if retry_state.outcome else None
+        if isinstance(error, _AllCoolingDown):
+            wait = max(wait, error.wait)
+        return wait
+
+
+class KeySlot:
+    """One API key, its client and what we last learned about its quota."""
+
+    def __init__(self, key, client):
+        self.key = key
+        self.client = client
+        self.remaining_requests = None
+        self.remaining_tokens = None
+        self.cooldown_until = 0.0
+        self.in_flight = 0
+        self.requests = 0
+        self.rate_limited = 0
+        self.errors = 0
+
+    @property
+    def label(self):
+        return f"…{self.key[-4:]}" if self.key else "injected"
+
+    def available(self, now):
+        return now >= self.cooldown_until
+
+
+class GroqClientPool:
+    """
+    Spreads chat completions across several Groq keys, one client per key.
+
+    Each request goes to the available key with the fewest in-flight requests (ties go
+    to the most remaining quota, as reported by the x-ratelimit-* response headers).
+    A 429 parks that key until its retry-after/reset time, and the request is retried
+    on another key with jittered exponential backoff. Empty keys are ignored.
+    """
+
+    RETRYABLE = (groq.RateLimitError, groq.APIConnectionError, groq.InternalServerError,
+                 groq.AuthenticationError)
+
+    def __init__(self, api_keys, max_attempts=4, client_factory=None):
+        factory = client_factory or (lambda key: groq.Groq(api_key=key, max_retries=0))
+        keys = [k.strip() for k in dict.fromkeys(api_keys) if k and k.strip()]
+        if not keys:
+            raise ValueError("No Groq API keys configured.")
+        self.slots = [KeySlot(k, factory(k)) for k in keys]
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_clients(cls, clients, max_attempts=4):
+        """Pool over ready-made clients (e.g. fake_llm.FakeStreamingClient for offline runs)."""
+        pool = cls.__new__(cls)
+        pool.slots = [KeySlot(None, c) for c in clients]
+        pool.max_attempts = max_attempts
+        pool._lock = threading.Lock()
+        return pool
+
+    # --- KEY SELECTION ---
+    def _acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            ready = [s for s in self.slots if s.available(now)]
+            if not ready:
+                wait = min(s.cooldown_until for s in self.slots) - now
+                if wait > MAX_WAIT_FOR_KEY:
+                    raise LLMUnavailableError(f"all keys rate-limited for another {wait:.0f}s")
+                raise _AllCoolingDown(wait)
+            slot = min(ready, key=lambda s: (s.in_flight, -(s.remaining_requests if s.remaining_requests is not None
+                                                              else float('inf'))))
+            slot.in_flight += 1
+            slot.requests += 1
+            return slot
+
+    def _release(self, slot):
+        with self._lock:
+            slot.in_flight -= 1
+
+    def _record_headers(self, slot, headers):
+        if not headers:
+            return
+        with self._lock:
+            remaining = headers.get('x-ratelimit-remaining-requests')
+            tokens = headers.get('x-ratelimit-remaining-tokens')
+            if remaining is not None:
+                slot.remaining_requests = int(float(remaining))
+            if tokens is not None:
+                slot.remaining_tokens = int(float(tokens))
+            # Out of requests for this window: sit out until it resets rather than eating a 429
+            if slot.remaining_requests == 0:
+                reset = parse_duration(headers.get('x-ratelimit-reset-requests')) or DEFAULT_COOLDOWN
+                slot.cooldown_until = time.monotonic() + reset
+
+    def _record_failure(self, slot, error):
+        with self._lock:
+            if isinstance(error, groq.RateLimitError):
+                slot.rate_limited += 1
+                headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+                wait = (parse_duration(headers.get('retry-after'))
+                        or parse_duration(headers.get('x-ratelimit-reset-requests'))
+                        or parse_duration(headers.get('x-ratelimit-reset-tokens'))
+                        or DEFAULT_COOLDOWN)
+                slot.remaining_requests = 0
+                slot.cooldown_until = time.monotonic() + wait
+            elif isinstance(error, groq.AuthenticationError):
+                slot.errors += 1
+                slot.cooldown_until = time.monotonic() + AUTH_FAILURE_COOLDOWN
+            else:
+                slot.errors += 1
+
+    # --- REQUESTS ---
+    def _create_once(self, kwargs):
+        slot = self._acquire()
+        try:
+            completions = slot.client.chat.completions
+            raw_api = getattr(completions, 'with_raw_response', None)
+            if raw_api is not None:
+                raw = raw_api.create(**kwargs)
+                self._record_headers(slot, raw.headers)
+                result = raw.parse()
+            else:
+                result = completions.create(**kwargs)
+        except Exception as e:
+            self._record_failure(slot, e)
+            self._release(slot)
+            raise
+
+        if kwargs.get('stream'):
+            # Keep the key counted as busy until the caller has drained the stream
+            return self._drain(slot, result)
+        self._release(slot)
+        return result
+
+    def _drain(self, slot, stream):
+        try:
+            yield from stream
+        finally:
+            self._release(slot)
+
+    def create(self, **kwargs):
+        """
+        Same arguments as ``client.chat.completions.create``; retried across keys on 429/5xx/network
+        errors. Any other API error (400 context too long, 404 retired model, ...) is not retried but
+        is raised as LLMUnavailableError too, so callers need only one except clause.
+        """
+        retrying = Retrying(
+            stop=stop_after_attempt(self.max_attempts),
+            wait=_wait_for_keys(wait_random_exponential(multiplier=0.5, max=8)),
+            retry=retry_if_exception_type(self.RETRYABLE + (_AllCoolingDown,)),
+            reraise=True,
+        )
+        try:
+            for attempt in retrying:
+                with attempt:
+                    return self._create_once(kwargs)
+        except self.RETRYABLE + (_AllCoolingDown, groq.APIError) as e:
+            raise LLMUnavailableError(str(e) or type(e).__name__) from e
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            return [{
+                'key': s.label,
+                'requests': s.requests,
+                'rate_limited': s.rate_limited,
+                'errors': s.errors,
+                'in_flight': s.in_flight,
+                'remaining_requests': s.remaining_requests,
+                'remaining_tokens': s.remaining_tokens,
+                'cooldown_s': round(max(0.0, s.cooldown_until - now), 1),
+            } for s in self.slots]
@@ -0,0 +1,51 @@
+import os
+from PIL import Image, ImageOps
+
+# Longest edge in pixels for each thumbnail; 'small' feeds the audit queue, 'large' the gallery/portfolio
+THUMBNAIL_SIZES = {'small': 200, 'large': 800}
+THUMBNAIL_QUALITY = 80
+
+
+def thumbnail_path(src_path, size):
+    """Where the ``size`` px WebP thumbnail of ``src_path`` lives (a thumbs/ folder next to the original)."""
+    folder, name = os.path.split(src_path)
+    stem = os.path.splitext(name)[0]
+    return os.path.join(folder, "thumbs", f"{stem}_{size}.webp")
+
+
+def create_thumbnails(src_path, sizes=None, overwrite=False):
+    """
+    Writes EXIF-oriented WebP thumbnails for an image and returns {'small': path, 'large': path}.
+    Returns an empty dict if the file is missing or is not an image Pillow can read.
+    """
+    sizes = sizes or THUMBNAIL_SIZES
+    targets = {name: thumbnail_path(src_path, px) for name, px in sizes.items()}
+    if not overwrite and all(os.path.exists(p) for p in targets.values()):
+        return targets
+
+    try:
+        with Image.open(src_path) as im:
+            # Let the JPEG decoder downscale while decoding instead of inflating a 12MP photo
+            longest = max(sizes.values())
+            im.draft('RGB', (longest, longest))
+            im = ImageOps.exif_transpose(im)
+            im = im.convert('RGBA' if im.mode in ('RGBA', 'LA', 'P') else 'RGB')
+
+            os.makedirs(os.path.dirname(next(iter(targets.values()))), exist_ok=True)
+            # Largest first, then shrink that result for the smaller sizes
+            for name, px in sorted(sizes.items(), key=lambda item: -item[1]):
+                im.thumbnail((px, px), Image.LANCZOS)
+                im.save(targets[name], 'WEBP', quality=THUMBNAIL_QUALITY, method=4)
+    except OSError:
+        # Missing file, or not an image Pillow understands (UnidentifiedImageError is an OSError)
+        return {}
+    return targets
+
+
+def best_image(row, size):
+    """Picks the thumbnail for ``size`` ('small'/'large') from an activity row, falling back to the original."""
+    for col in (f"thumb_{size}", "file_path"):
+        path = row.get(col)
+        if path and isinstance(path, str) and os.path.exists(path):
+            return path
+    return None
@@ -0,0 +1,146 @@
+"""
+Cohort-wide admin insights: runs the FUTURE PERSPECTIVE / AREAS TO IMPROVE / HELP NEEDED
+analysis for every student in the school (or one grade section) and stores the three
+sections in the student_insights table.
+
+Students whose grades and activities have not changed since their stored insight
+are skipped, so an interrupted run picks up where it left off:
+
+    GROQ_API_KEYS=key1,key2 python insight_batch.py [db_path] [--section "Grade 10 - A"] [--force]
+"""
+import os
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from ai_interviewer import ADMIN_INSIGHT_CONTEXT
+from llm_cache import data_fingerprint
+
+# Heading text -> student_insights column
+INSIGHT_SECTIONS = {
+    'FUTURE PERSPECTIVE': 'future_perspective',
+    'AREAS TO IMPROVE': 'areas_to_improve',
+    'HELP NEEDED': 'help_needed',
+}
+_HEADING = re.compile(r"(FUTURE PERSPECTIVE|AREAS TO IMPROVE|HELP NEEDED)\s*\**\s*:?", re.IGNORECASE)
+
+
+def parse_insight_sections(text):
+    """Splits an admin insight reply into {column: text}; a missing heading maps to None."""
+    sections = dict.fromkeys(INSIGHT_SECTIONS.values())
+    matches = list(_HEADING.finditer(text or ""))
+    for i, m in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        # Drop the emoji / markdown bullet that introduces the next heading
+        body = re.sub(r"[^\w.!?)\]]+$", "", text[m.end():end]).strip(" *-\n")
+        sections[INSIGHT_SECTIONS[m.group(1).upper()]] = body or None
+    return sections
+
+
+class InsightBatchJob:
+    """
+    Generates admin insights for many students concurrently.
+
+    The calls are network-bound, so a thread pool overlaps them; the AI client's key
+    pool spreads them over the configured Groq keys and backs off on 429s. By default
+    the job runs two requests per key so each key always has one queued behind the
+    one in flight.
+    """
+
+    def __init__(self, db, ai, workers=None):
+        self.db = db
+        self.ai = ai
+        self.workers = workers or max(2, 2 * ai.backend.parallelism)
+
+    def generate(self, sid):
+        """Generates (or reuses the cached) insight for one student, stores it and returns the reply text."""
+        grades, activities = self.db.read_student_profile(sid)
+        return self._store(sid, grades, activities, data_fingerprint(grades, activities))
+
+    def _store(self, sid, grades, activities, fingerprint):
+        text = self.ai.fetch_career_roadmap(grades, activities, ADMIN_INSIGHT_CONTEXT)
+        self.db.save_student_insight(sid, parse_insight_sections(text), fingerprint)
+        return text
+
+    def _generate(self, sid, stored_fingerprint):
+        """Loads one student's profile on the worker thread; returns False if their insight is up to date."""
+        # Read past the query cache: a whole-school run would otherwise evict every live page
+        grades, activities = self.db.read_student_profile(sid)
+        fingerprint = data_fingerprint(grades, activities)
+        if fingerprint == stored_fingerprint:
+            return False
+        self._store(sid, grades, activities, fingerprint)
+        return True
+
+    def run(self, grade_section=None, force=False, progress=None):
+        """
+        Processes the cohort; ``progress(done, total, sid)`` is called from the calling thread.
+        Returns {'processed', 'skipped', 'failed', 'elapsed_s', 'per_minute'}.
+
+        At most two students per worker are queued at a time, so if ``progress`` raises
+        (e.g. Streamlit stopping the script) the job returns at once: queued students are
+        cancelled and only the requests already in flight finish in the background.
+        """
+        started = time.monotonic()
+        sids = self.db.get_cohort_ids(grade_section)
+        stored = {} if force else self.db.get_insight_fingerprints(sids)
+
+        processed = skipped = failed = done = 0
+        if progress:
+            progress(done, len(sids), None)
+        queue = iter(sids)
+        futures = {}
+        pool = ThreadPoolExecutor(max_workers=self.workers)
+
+        def submit_next():
+            sid = next(queue, None)
+            if sid is not None:
+                futures[pool.submit(self._generate, sid, stored.get(sid))] = sid
+
+        try:
+            for _ in range(2 * self.workers):
+                submit_next()
+            while futures:
+                finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    sid = futures.pop(future)
+                    try:
+                        if future.result():
+                            processed += 1
+                        else:
+                            skipped += 1
+                    except Exception:
+                        # AI unavailable, a locked database, ...: left without an insight; the next run retries it
+                        failed += 1
+                    done += 1
+                    submit_next()
+                    if progress:
+                        progress(done, len(sids), sid)
+        finally:
+            pool.shutdown(wait=not futures, cancel_futures=True)
+
+        elapsed = time.monotonic() - started
+        return {
+            'processed': processed,
+            'skipped': skipped,
+            'failed': failed,
+            'elapsed_s': round(elapsed, 1),
+            'per_minute': round(processed / elapsed * 60, 1) if elapsed else 0.0,
+        }
+
+
+if __name__ == "__main__":
+    from database import DatabaseManager
+    from ai_interviewer import EvidenceInterviewer
+    from llm_cache import LLMResponseCache
+
+    args = sys.argv[1:]
+    section = args[args.index("--section") + 1] if "--section" in args else None
+    positional = [a for i, a in enumerate(args) if not a.startswith("--") and (i == 0 or args[i - 1] != "--section")]
+    db = DatabaseManager(positional[0] if positional else "school_portal.db")
+    keys = os.environ.get("GROQ_API_KEYS", "").split(",")
+    ai = EvidenceInterviewer(keys, response_cache=LLMResponseCache("llm_cache.db"))
+    report = InsightBatchJob(db, ai).run(section, force="--force" in args,
+                                         progress=lambda d, t, sid: print(f"  ...{d}/{t} {sid or ''}"))
+    print(f"✅ Insights: {report['processed']} generated, {report['skipped']} up to date, "
+          f"{report['failed']} failed ({report['per_minute']}/min).")
@@ -0,0 +1,112 @@
+"""
+Chat-model backends behind one small interface, so the AI features can run against
+Groq, Gemini or an offline stand-in (fake_llm.FakeBackend) without code changes.
+
+Messages are OpenAI-style dicts: {"role": "system" | "user" | "assistant", "content": str}.
+"""
+from typing import Iterator, List, Optional, Protocol
+from groq_pool import GroqClientPool, LLMUnavailableError
+
+GROQ_MODEL_ID = "llama-3.3-70b-versatile"
+GEMINI_MODEL_ID = "gemini-2.0-flash"
+
+
+class LLMBackend(Protocol):
+    """What EvidenceInterviewer and CareerAI need from a model provider."""
+
+    #: Identifies the model in cache keys; change it and cached replies are not reused
+    model_id: str
+    #: How many requests the backend can usefully run at once (batch jobs size their pools from it)
+    parallelism: int
+
+    def stream(self, messages: List[dict], temperature: Optional[float] = None) -> Iterator[str]:
+        """Yields reply text as it arrives; raises LLMUnavailableError if the provider cannot answer."""
+
+    def complete(self, messages: List[dict], temperature: Optional[float] = None) -> str:
+        """The whole reply at once; raises LLMUnavailableError."""
+
+    def stats(self) -> List[dict]:
+        """Per-key / per-endpoint counters for the admin dashboard."""
+
+
+class GroqBackend:
+    """Groq chat completions spread over several keys by groq_pool.GroqClientPool."""
+
+    def __init__(self, api_keys=(), model_id=GROQ_MODEL_ID, clients=None, max_attempts=4):
+        self.model_id = model_id
+        # ``clients`` lets offline runs inject stand-ins (see fake_llm)
+        self.pool = GroqClientPool.from_clients(clients, max_attempts) if clients \
+            else GroqClientPool(api_keys, max_attempts)
+
+    @property
+    def parallelism(self):
+        return len(self.pool.slots)
+
+    def stream(self, messages, temperature=None):
+        kwargs = {} if temperature is None else {'temperature': temperature}
+        stream = self.pool.create(model=self.model_id, messages=messages, stream=True, **kwargs)
+        try:
+            for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    yield delta
+        except Exception as e:
+            # The connection dropped mid-answer; surface it like any other outage
+            raise LLMUnavailableError(str(e)) from e
+
+    def complete(self, messages, temperature=None):
+        return "".join(self.stream(messages, temperature))
+
+    def stats(self):
+        return self.pool.stats()
+
+
+class GeminiBackend:
+    """Google Gemini through the google-genai client (a single key, no pooling)."""
+
+    parallelism = 1
+
+    def __init__(self, api_key, model_id=GEMINI_MODEL_ID, client=None):
+        from google import genai
+        self.model_id = model_id
+        self.client = client or genai.Client(api_key=api_key)
+        self.requests = 0
+        self.errors = 0
+
+    @staticmethod
+    def _request(messages, temperature):
+        """Splits chat messages into Gemini contents plus a system instruction."""
+        system = "\n\n".join(m["content"] for m in messages if m["role"] == "system")
+        contents = [{"role": "model" if m["role"] == "assistant" else "user", "parts": [{"text": m["content"]}]}
+                    for m in messages if m["role"] != "system"]
+        config = {}
+        if system:
+            config['system_instruction'] = system
+        if temperature is not None:
+            config['temperature'] = temperature
+        return contents, config or None
+
+    def stream(self, messages, temperature=None):
+        contents, config = self._request(messages, temperature)
+        self.requests += 1
+        try:
+            for chunk in self.client.models.generate_content_stream(model=self.model_id, contents=contents,
+                                                                    config=config):
+                if chunk.text:
+                    yield chunk.text
+        except Exception as e:
+            # API errors, timeouts and dropped connections alike, as GroqBackend.stream does
+            self.errors += 1
+            raise LLMUnavailableError(str(e) or type(e).__name__) from e
+
+    def complete(self, messages, temperature=None):
+        contents, config = self._request(messages, temperature)
+        self.requests += 1
+        try:
+            return self.client.models.generate_content(model=self.model_id, contents=contents, config=config).text
+        except Exception as e:
+            self.errors += 1
+            raise LLMUnavailableError(str(e) or type(e).__name__) from e
+
+    def stats(self):
+        return [{'key': 'gemini', 'requests': self.requests, 'errors': self.errors}]
@@ -0,0 +1,121 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import pandas as pd
+
+
+def data_fingerprint(*frames):
+    """Stable hash of DataFrames' columns and contents (row order matters, the index does not)."""
+    h = hashlib.sha256()
+    for df in frames:
+        h.update("|".join(map(str, df.columns)).encode())
+        if not df.empty:
+            h.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return h.hexdigest()
+
+
+def student_of(*frames):
+    """The student a set of profile frames belongs to, if they carry a student_id column."""
+    for df in frames:
+        if 'student_id' in df.columns and not df.empty:
+            return str(df['student_id'].iloc[0])
+    return None
+
+
+class LLMResponseCache:
+    """
+    Persistent cache of LLM completions, kept in its own SQLite file so cache writes
+    never count as school-data writes (and never bump DatabaseManager.data_version).
+
+    Keys hash the model, the prompt template version, the request context and a
+    fingerprint of the student's grades/activities, so any change to the student's
+    data is a miss. Older entries for that student are purged on the next lookup.
+    Entries expire after ``ttl`` seconds; past ``max_bytes`` the least recently used
+    responses are evicted.
+    """
+
+    def __init__(self, path="llm_cache.db", ttl=7 * 24 * 3600, max_bytes=20 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute('''CREATE TABLE IF NOT EXISTS llm_cache
+                (key TEXT PRIMARY KEY,
+                 student_id TEXT,
+                 fingerprint TEXT,
+                 model TEXT,
+                 response TEXT,
+                 size INTEGER,
+                 created REAL,
+                 last_used REAL)''')
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_student ON llm_cache (student_id)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_last_used ON llm_cache (last_used)")
+
+    @staticmethod
+    def make_key(model, template_version, context, fingerprint):
+        payload = json.dumps([model, template_version, context, fingerprint])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get_or_create(self, model, template_version, context, grades_df, activities_df, generate):
+        """Returns the cached response for this request, or calls ``generate()`` and stores its result."""
+        fingerprint = data_fingerprint(grades_df, activities_df)
+        sid = student_of(grades_df, activities_df)
+        key = self.make_key(model, template_version, context, fingerprint)
+        now = time.time()
+
+        with self._lock, self._conn:
+            if sid is not None:
+                # The student's data changed since these were generated; they can never hit again
+                self._conn.execute("DELETE FROM llm_cache WHERE student_id=? AND fingerprint!=?", (sid, fingerprint))
+            row = self._conn.execute("SELECT response, created FROM llm_cache WHERE key=?", (key,)).fetchone()
+            if row and now - row[1] <= self.ttl:
+                self._conn.execute("UPDATE llm_cache SET last_used=? WHERE key=?", (now, key))
+                self.hits += 1
+                return row[0]
+            self.misses += 1
+
+        response = generate()
+        if not response:
+            # e.g. Gemini returns text=None for a blocked reply; let the next request try again
+            return response
+
+        with self._lock, self._conn:
+            self._conn.execute('''INSERT OR REPLACE INTO llm_cache
+                                  (key, student_id, fingerprint, model, response, size, created, last_used)
+                                  VALUES (?,?,?,?,?,?,?,?)''',
+                               (key, sid, fingerprint, model, response, len(response.encode()), now, now))
+            self._evict(now)
+        return response
+
+    def _evict(self, now):
+        self._conn.execute("DELETE FROM llm_cache WHERE created < ?", (now - self.ttl,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Walk from least recently used until we are back under budget
+        excess, doomed = total - self.max_bytes, []
+        for key, size in self._conn.execute("SELECT key, size FROM llm_cache ORDER BY last_used"):
+            doomed.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        self._conn.executemany("DELETE FROM llm_cache WHERE key=?", doomed)
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'entries': entries,
+                'bytes': size,
+                'max_bytes': self.max_bytes,
+            }
@@ -0,0 +1,208 @@
+"""
+Routes requests across several LLM backends (e.g. Groq and Gemini) by observed
+latency and health, with optional hedging of blocking requests to cut tail latency.
+
+    backend = LLMRouter([GroqBackend(groq_keys), GeminiBackend(gemini_key)])
+    EvidenceInterviewer(groq_keys, backend=backend)
+"""
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from groq_pool import LLMUnavailableError
+
+# Latency samples kept per provider
+WINDOW = 50
+# Below this many samples a provider's latency is unknown and it is tried as if it were fastest
+MIN_SAMPLES = 5
+# Hedge deadline while the primary's p90 is still unknown
+DEFAULT_HEDGE_DELAY = 3.0
+# A provider that fails this many times in a row sits out for COOLDOWN seconds
+MAX_CONSECUTIVE_FAILURES = 3
+COOLDOWN = 30.0
+
+
+class ProviderHealth:
+    """Rolling latency and error record for one backend."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.latency = deque(maxlen=WINDOW)
+        self.first_token = deque(maxlen=WINDOW)
+        self.outcomes = deque(maxlen=WINDOW)
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.requests = 0
+        self.wins = 0
+        self.hedges = 0
+
+    @property
+    def name(self):
+        return self.backend.model_id
+
+    def healthy(self, now):
+        return now >= self.cooldown_until
+
+    def error_rate(self):
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+    @staticmethod
+    def _quantile(samples, q):
+        if len(samples) < MIN_SAMPLES:
+            return None
+        return statistics.quantiles(samples, n=100, method='inclusive')[int(q * 100) - 1]
+
+    def p50(self, streaming=False):
+        return self._quantile(self.first_token if streaming else self.latency, 0.5)
+
+    def p90(self):
+        return self._quantile(self.latency, 0.9)
+
+    def score(self, streaming=False):
+        """Lower is better: median latency inflated by the recent error rate; unknown counts as 0 (explore)."""
+        median = self.p50(streaming)
+        if median is None and streaming:
+            median = self.p50()
+        return (median or 0.0) * (1 + 2 * self.error_rate())
+
+
+class LLMRouter:
+    """
+    An llm_backends.LLMBackend that picks, per request, the healthy backend with the
+    best recent latency (time to first token for streams, total time otherwise).
+
+    ``complete`` is hedged: if the primary has not answered by its own p90 latency, the
+    next-best backend is asked too and the first successful reply wins (the slower call
+    finishes in the background and still feeds the latency stats). ``stream`` is not
+    hedged, but fails over to the next backend if one errors before its first chunk.
+    """
+
+    def __init__(self, backends, hedge=True, min_hedge_delay=0.25, max_workers=16):
+        if not backends:
+            raise ValueError("LLMRouter needs at least one backend.")
+        self.providers = [ProviderHealth(b) for b in backends]
+        self.hedge = hedge
+        self.min_hedge_delay = min_hedge_delay
+        self.model_id = "router:" + "+".join(b.model_id for b in backends)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-hedge")
+
+    @property
+    def parallelism(self):
+        return sum(p.backend.parallelism for p in self.providers)
+
+    # --- BOOKKEEPING ---
+    def _ranked(self, streaming=False):
+        now = time.monotonic()
+        with self._lock:
+            # Mostly-failing providers go last even before their cooldown kicks in
+            return sorted(self.providers, key=lambda p: (not p.healthy(now), p.error_rate() > 0.5, p.score(streaming)))
+
+    def _record(self, provider, ok, elapsed=None, first_token=None):
+        with self._lock:
+            provider.outcomes.append(ok)
+            if ok:
+                provider.consecutive_failures = 0
+                if elapsed is not None:
+                    provider.latency.append(elapsed)
+                if first_token is not None:
+                    provider.first_token.append(first_token)
+            else:
+                provider.consecutive_failures += 1
+                if provider.consecutive_failures >= MAX_CONSECUTIVE_FAILURES:
+                    provider.cooldown_until = time.monotonic() + COOLDOWN
+
+    def _timed_complete(self, provider, messages, temperature):
+        with self._lock:
+            provider.requests += 1
+        start = time.monotonic()
+        try:
+            text = provider.backend.complete(messages, temperature)
+        except Exception as e:
+            # Whatever a backend leaks (timeouts, dropped connections) counts against its health
+            self._record(provider, False)
+            if isinstance(e, LLMUnavailableError):
+                raise
+            raise LLMUnavailableError(str(e) or type(e).__name__) from e
+        self._record(provider, True, elapsed=time.monotonic() - start)
+        return text
+
+    def _hedge_delay(self, provider):
+        p90 = provider.p90()
+        return max(self.min_hedge_delay, p90 if p90 is not None else DEFAULT_HEDGE_DELAY)
+
+    # --- LLMBackend ---
+    def complete(self, messages, temperature=None):
+        ranked = self._ranked()
+        pending = {self._executor.submit(self._timed_complete, ranked[0], messages, temperature): ranked[0]}
+        backups = ranked[1:]
+        deadline = self._hedge_delay(ranked[0]) if self.hedge else None
+        last_error = None
+
+        while pending:
+            done, _ = wait(pending, timeout=deadline if backups else None, return_when=FIRST_COMPLETED)
+            if not done:
+                # Primary is slower than its own p90: ask the next provider as well
+                provider = backups.pop(0)
+                with self._lock:
+                    provider.hedges += 1
+                pending[self._executor.submit(self._timed_complete, provider, messages, temperature)] = provider
+                continue
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    text = future.result()
+                except LLMUnavailableError as e:
+                    last_error = e
+                    continue
+                with self._lock:
+                    provider.wins += 1
+                return text
+            if not pending and backups:
+                # Everything in flight failed; fail over straight away
+                provider = backups.pop(0)
+                pending[self._executor.submit(self._timed_complete, provider, messages, temperature)] = provider
+        raise LLMUnavailableError(f"all providers failed: {last_error}")
+
+    def stream(self, messages, temperature=None):
+        last_error = None
+        for provider in self._ranked(streaming=True):
+            with self._lock:
+                provider.requests += 1
+            start = time.monotonic()
+            first = None
+            try:
+                for chunk in provider.backend.stream(messages, temperature):
+                    if first is None:
+                        first = time.monotonic() - start
+                    yield chunk
+            except Exception as e:
+                self._record(provider, False)
+                if first is not None:
+                    # Part of the answer is already on screen; switching models now would garble it
+                    if isinstance(e, LLMUnavailableError):
+                        raise
+                    raise LLMUnavailableError(str(e) or type(e).__name__) from e
+                last_error = e
+                continue
+            self._record(provider, True, first_token=first)
+            with self._lock:
+                provider.wins += 1
+            return
+        raise LLMUnavailableError(f"all providers failed: {last_error}")
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            return [{
+                'provider': p.name,
+                'healthy': p.healthy(now),
+                'requests': p.requests,
+                'wins': p.wins,
+                'hedges': p.hedges,
+                'error_rate': round(p.error_rate(), 3),
+                'p50_ms': round(p.p50() * 1000) if p.p50() is not None else None,
+                'p90_ms': round(p.p90() * 1000) if p.p90() is not None else None,
+                'first_token_p50_ms': round(p.p50(True) * 1000) if p.p50(True) is not None else None,
+            } for p in self.providers]
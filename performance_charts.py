@@ -0,0 +1,63 @@
+"""
+Per-student performance-history figures for the Academic Records tab.
+
+Figures are built once and cached under ('profile', sid, 'chart', ...) in the
+DatabaseManager query cache, so every write that touches the student (which already
+invalidates ('profile', sid)) also drops their charts, and reruns reuse the figure.
+
+Long histories are aggregated to one point per subject per year, with a drill-down
+into any single year's terms, so the figure JSON sent to the browser stays small.
+"""
+import pandas as pd
+import plotly.express as px
+from grade_analytics import PASS_MARK, TERM_ORDER
+
+# Above this many terms the overview switches to yearly averages
+MAX_TERM_POINTS = 12
+
+
+def _with_periods(grades_df):
+    g = grades_df.dropna(subset=['mark']).copy()
+    g['term'] = pd.Categorical(g['term'], categories=TERM_ORDER + sorted(set(g['term']) - set(TERM_ORDER)),
+                               ordered=True)
+    g = g.sort_values(['year', 'term'])
+    g['period'] = g['year'].astype(str) + " - " + g['term'].astype(str)
+    return g
+
+
+def build_history_figure(sid, grades_df, year=None, height=None):
+    """
+    Returns (figure dict, years with grades, aggregated?). ``year`` drills into one year's
+    terms; otherwise the whole history is shown per term, or per year when it is long.
+    """
+    g = _with_periods(grades_df)
+    years = sorted(g['year'].unique().tolist())
+    aggregated = False
+    if year is not None:
+        g = g[g['year'] == year]
+        title = f"{sid}: {year} by Term"
+    elif g['period'].nunique() > MAX_TERM_POINTS:
+        g = g.groupby(['year', 'subject'], as_index=False)['mark'].mean().round(1)
+        g['period'] = g['year'].astype(str)
+        aggregated = True
+        title = f"{sid}: Yearly Average"
+    else:
+        title = f"Performance History: {sid}"
+
+    fig = px.line(g, x='period', y='mark', color='subject', markers=True, title=title,
+                  labels={'period': '', 'mark': 'Mark (%)'})
+    fig.add_hline(y=PASS_MARK, line_dash="dash", line_color="red", annotation_text="Pass Mark")
+    # Streamlit applies its own theme; shipping plotly's default template would double the payload
+    fig.update_layout(template=None, height=height, margin=dict(l=10, r=10, t=50, b=10))
+    fig.update_traces(hovertemplate="%{y}")
+    return fig.to_dict(), years, aggregated
+
+
+def student_history_chart(db, sid, year=None, height=None):
+    """Cached build_history_figure for one student; None when they have no grades yet."""
+    def load():
+        grades, _ = db.get_student_profile(sid)
+        if grades.empty:
+            return None
+        return build_history_figure(sid, grades, year, height)
+    return db.cache.get_or_load(('profile', sid, 'chart', year, height), load)
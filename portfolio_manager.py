@@ -1,26 +1,50 @@
 import os
-from datetime import datetime
+import hashlib
+import tempfile
 from ai_interviewer import EvidenceInterviewer
+from image_pipeline import create_thumbnails
 
 class PortfolioManager:
-    def __init__(self, storage_dir="student_evidence"):
+    """
+    Content-addressed evidence store.
+
+    Uploads are streamed to disk in chunks while being hashed, then kept once under
+    objects/<aa>/<bb>/<sha256>.<ext>. Identical photos (common with event uploads)
+    share one file; the database keeps a reference count so deletes are safe.
+    """
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, storage_dir="student_evidence", db=None):
         self.storage_dir = storage_dir
-        if not os.path.exists(self.storage_dir):
-            os.makedirs(self.storage_dir)
+        self.db = db
+        self.tmp_dir = os.path.join(self.storage_dir, "tmp")
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    def object_path(self, digest, ext):
+        return os.path.join(self.storage_dir, "objects", digest[:2], digest[2:4], f"{digest}.{ext}")
 
     def save_evidence(self, student_id, uploaded_file):
-        """Saves physical file to a student-specific folder."""
-        student_path = os.path.join(self.storage_dir, str(student_id))
-        if not os.path.exists(student_path):
-            os.makedirs(student_path)
-            
-        file_ext = uploaded_file.name.split('.')[-1]
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        file_name = f"evidence_{timestamp}.{file_ext}"
-        full_path = os.path.join(student_path, file_name)
-        
-        with open(full_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
-        
-        return full_path
\ No newline at end of file
+        """Stores the upload (once per unique content); returns (path, {'small': ..., 'large': ...} thumbnails)."""
+        ext = uploaded_file.name.rsplit('.', 1)[-1].lower() if '.' in uploaded_file.name else "bin"
+        hasher = hashlib.sha256()
+
+        # 1. Stream into a temp file inside the store so the final rename is atomic
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir)
+        uploaded_file.seek(0)
+        with os.fdopen(fd, "wb") as out:
+            for chunk in iter(lambda: uploaded_file.read(self.CHUNK_SIZE), b""):
+                hasher.update(chunk)
+                out.write(chunk)
+        digest = hasher.hexdigest()
+
+        # 2. Reuse the stored copy if this content is already known; the reference itself is
+        #    taken by DatabaseManager.save_activity in the same transaction as the activity row
+        full_path = (self.db.blob_path(digest) if self.db is not None else None) or self.object_path(digest, ext)
+
+        if os.path.exists(full_path):
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            os.replace(tmp_path, full_path)
+
+        return full_path, create_thumbnails(full_path)
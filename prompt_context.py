@@ -0,0 +1,159 @@
+"""
+Compact, token-budgeted student context for LLM prompts.
+
+Embedding ``DataFrame.to_string()`` sends every raw row, the index, file paths and
+column padding, so prompts grow with every term a student is enrolled. This builds
+aggregates instead — per-subject latest mark, average and trend, term averages,
+deduplicated skills and the most recent projects — and drops the least important
+lines (oldest projects, rarest skills, oldest terms) until it fits ``max_tokens``.
+"""
+import math
+import pandas as pd
+
+DEFAULT_TOKEN_BUDGET = 600
+# Rough chars-per-token for English prose on Llama/Gemini tokenizers; good enough for budgeting
+CHARS_PER_TOKEN = 4
+SUMMARY_CHARS = 160
+# Older terms are already reflected in each subject's average and trend
+MAX_TERMS = 6
+# Room kept back for the "(+N more ... omitted)" notes
+_NOTE_CHARS = 30
+
+
+def estimate_tokens(text):
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _periods(grades_df):
+    """Grades with a sortable (year, term) period label, oldest first."""
+    g = grades_df.dropna(subset=['subject', 'mark']).copy()
+    g['mark'] = pd.to_numeric(g['mark'], errors='coerce')
+    g = g.dropna(subset=['mark'])
+    g['period'] = g['year'].astype(str) + " " + g['term'].astype(str)
+    return g.sort_values(['year', 'term'], kind='stable')
+
+
+def _subject_lines(g):
+    if g.empty:
+        return []
+    by_period = g.groupby(['subject', 'period'], sort=False)['mark'].mean().reset_index()
+    lines = []
+    for subject, rows in by_period.groupby('subject', sort=True):
+        marks = rows['mark'].tolist()
+        trend = marks[-1] - marks[0]
+        arrow = "steady" if len(marks) < 2 or abs(trend) < 2 else f"{'up' if trend > 0 else 'down'} {abs(trend):.0f}"
+        lines.append(f"- {subject}: latest {marks[-1]:.0f} ({rows['period'].iloc[-1]}), "
+                     f"avg {sum(marks) / len(marks):.0f}, trend {arrow} over {len(marks)} terms")
+    return lines
+
+
+def _term_lines(g):
+    """Overall average per term, newest first."""
+    if g.empty:
+        return []
+    terms = g.groupby('period', sort=False)['mark'].mean()
+    return [f"- {period}: {mark:.1f}" for period, mark in reversed(list(terms.items()))]
+
+
+def _skills(activities_df):
+    """Skills across all activities, deduplicated case-insensitively, most frequent first."""
+    if activities_df.empty or 'skills' not in activities_df.columns:
+        return []
+    skills = activities_df['skills'].dropna().astype(str).str.split(',').explode().str.strip()
+    skills = skills[(skills != '') & (skills.str.upper() != 'N/A')]
+    if skills.empty:
+        return []
+    # Count each skill once per activity that lists it
+    skills = skills.to_frame('name').assign(key=skills.str.lower()).reset_index()
+    skills = skills.drop_duplicates(['index', 'key'])
+    counts = skills.groupby('key')['name'].agg(['first', 'size'])
+    counts = counts.sort_values(['size', 'first'], ascending=[False, True])
+    return [f"{name} (x{n})" if n > 1 else name for name, n in zip(counts['first'], counts['size'])]
+
+
+def _activity_lines(activities_df):
+    """One line per activity, newest first."""
+    if activities_df.empty:
+        return []
+    acts = activities_df.sort_values('date', ascending=False, kind='stable') if 'date' in activities_df.columns \
+        else activities_df
+    lines = []
+    for row in acts.itertuples(index=False):
+        summary = str(getattr(row, 'summary', '') or '').strip()
+        if len(summary) > SUMMARY_CHARS:
+            summary = summary[:SUMMARY_CHARS].rsplit(' ', 1)[0] + "…"
+        date = str(getattr(row, 'date', '') or '')[:10]
+        status = getattr(row, 'status', None)
+        tag = f" [{status}]" if status and status != 'approved' else ""
+        lines.append(f"- {date} {row.title}{tag}: {summary}")
+    return lines
+
+
+def build_student_context(grades_df, activities_df, max_tokens=DEFAULT_TOKEN_BUDGET):
+    """
+    Compact text summary of a student's grades and activities within ``max_tokens``.
+
+    Lines are admitted in priority order — subject summaries, then skills, then the last
+    MAX_TERMS term averages and projects newest first — and whatever does not fit is
+    counted in an "omitted" note rather than silently dropped.
+    """
+    g = _periods(grades_df) if not grades_df.empty else grades_df
+    subjects, terms = _subject_lines(g), _term_lines(g)
+    skills, projects = _skills(activities_df), _activity_lines(activities_df)
+
+    headers = ["ACADEMICS BY SUBJECT:", "SKILLS:", "TERM AVERAGES (newest first):",
+               f"PROJECTS ({len(projects)} total, newest first):"]
+    budget = max_tokens * CHARS_PER_TOKEN - sum(len(h) + 1 + _NOTE_CHARS for h in headers)
+
+    def admit(lines, sep=1):
+        nonlocal budget
+        kept = []
+        for line in lines:
+            if len(line) + sep > budget:
+                break
+            kept.append(line)
+            budget -= len(line) + sep
+        return kept
+
+    subjects_kept = admit(subjects)
+    skills_kept = admit(skills, sep=2)
+    terms_kept = admit(terms[:MAX_TERMS])
+    projects_kept = admit(projects)
+
+    def section(header, kept, total, noun, joiner="\n"):
+        body = joiner.join(kept) if kept else "- none recorded" if not total else ""
+        if len(kept) < total:
+            body += f"{joiner if kept else ''}(+{total - len(kept)} more {noun} omitted)"
+        return f"{header}\n{body}"
+
+    return "\n".join([
+        section(headers[0], subjects_kept, len(subjects), "subjects"),
+        section(headers[1], skills_kept, len(skills), "skills", joiner=", "),
+        section(headers[2], terms_kept, len(terms), "terms"),
+        section(headers[3], projects_kept, len(projects), "projects"),
+    ])
+
+
+def context_report(grades_df, activities_df, max_tokens=DEFAULT_TOKEN_BUDGET):
+    """How much smaller the compact context is than the raw ``to_string()`` dumps it replaces."""
+    raw = f"{grades_df.to_string()}\n{activities_df.to_string()}"
+    compact = build_student_context(grades_df, activities_df, max_tokens)
+    raw_tokens, compact_tokens = estimate_tokens(raw), estimate_tokens(compact)
+    return {
+        'raw_chars': len(raw),
+        'raw_tokens': raw_tokens,
+        'compact_chars': len(compact),
+        'compact_tokens': compact_tokens,
+        'budget_tokens': max_tokens,
+        'reduction': round(1 - compact_tokens / raw_tokens, 3) if raw_tokens else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    import sys
+    from database import DatabaseManager
+
+    db = DatabaseManager(sys.argv[2] if len(sys.argv) > 2 else "school_portal.db")
+    grades, activities = db.get_student_profile(sys.argv[1])
+    print(build_student_context(grades, activities))
+    print(context_report(grades, activities))
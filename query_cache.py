@@ -0,0 +1,94 @@
+import sys
+import threading
+import pandas as pd
+from cachetools import TTLCache
+
+
+def _sizeof(value):
+    """Approximate memory footprint of a cached value in bytes."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (tuple, list)):
+        return sum(_sizeof(v) for v in value) + sys.getsizeof(value)
+    if isinstance(value, dict):
+        # e.g. cached plotly figure dicts (see performance_charts)
+        return sum(_sizeof(k) + _sizeof(v) for k, v in value.items()) + sys.getsizeof(value)
+    return sys.getsizeof(value)
+
+
+def _copy(value):
+    # Callers (e.g. the Records chart) add columns to the frames they get back,
+    # so never hand out the cached object itself.
+    if isinstance(value, pd.DataFrame):
+        return value.copy()
+    if isinstance(value, tuple):
+        return tuple(_copy(v) for v in value)
+    return value
+
+
+class QueryCache:
+    """
+    Thread-safe read-through cache for DatabaseManager query results.
+
+    Entries expire after ``ttl`` seconds and the least recently used ones are
+    evicted once the cache holds more than ``max_bytes`` (measured with
+    DataFrame.memory_usage) or ``max_entries`` results. Keys are tuples whose
+    first element names the query, e.g. ('profile', sid) or ('roster',).
+    """
+
+    def __init__(self, max_entries=512, max_bytes=64 * 1024 * 1024, ttl=300):
+        self.max_entries = max_entries
+        self._data = TTLCache(maxsize=max_bytes, ttl=ttl, getsizeof=lambda entry: entry[1])
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get_or_load(self, key, loader):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self.hits += 1
+                return _copy(entry[0])
+            self.misses += 1
+            generation = self._generation
+
+        value = loader()
+        size = _sizeof(value)
+
+        with self._lock:
+            # Skip storing if a write invalidated anything while we were loading; the
+            # result may predate that write.
+            if generation == self._generation and size <= self._data.maxsize:
+                while len(self._data) >= self.max_entries:
+                    self._data.popitem()
+                self._data[key] = (value, size)
+        return _copy(value)
+
+    def invalidate(self, *keys):
+        """Drops the given keys; a key of ('name',) also drops every ('name', ...) entry."""
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            for key in keys:
+                for cached in [k for k in self._data.keys() if k[:len(key)] == key]:
+                    del self._data[cached]
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'invalidations': self.invalidations,
+                'entries': len(self._data),
+                'bytes': int(self._data.currsize),
+                'max_bytes': int(self._data.maxsize),
+            }
@@ -0,0 +1,16 @@
+"""
+Regenerates the student_summary table from grades and activities in one bulk pass
+(after restoring a backup, editing the database by hand, or changing the summary SQL).
+
+Usage:  python rebuild_summary.py [path/to/school_portal.db]
+"""
+import sys
+import time
+from database import DatabaseManager
+
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else "school_portal.db"
+    started = time.perf_counter()
+    count = DatabaseManager(db_path).rebuild_student_summary()
+    print(f"✅ Rebuilt summaries for {count} students in {time.perf_counter() - started:.1f}s.")
@@ -107,7 +107,7 @@ if st.session_state.role == "Admin":
                 ca.write(f"**Student:** {r['student_id']} | **Project:** {r['title']}")
                 if r['file_path']: ca.image(r['file_path'], width=300)
                 if cb.button("🗑️ Delete", key=f"aud_del_{idx}"):
-                    db.delete_activity(r['student_id'], r['title'], r['date'])
+                    db.delete_activity(int(r['id']))
                     st.rerun()
 
 # --- 7. STUDENT VIEW ---
@@ -173,15 +173,11 @@ else:
                 with st.form("finalize_ai_entry"):
                     up_img = st.file_uploader("Upload Image Proof (Mandatory)", type=['jpg','png','jpeg'])
                     if st.form_submit_button("🚀 Finalize & Save to Portfolio") and up_img:
-                        path = pf_manager.save_evidence(st.session_state.user, up_img)
+                        path, thumbs = pf_manager.save_evidence(st.session_state.user, up_img)
                         db.save_activity(st.session_state.user, st.session_state.pending_project['title'], 
                                          st.session_state.pending_project['summary'], 
-                                         st.session_state.pending_project['skills'], path)
-                        
-                        # Apply Grade Selection
-                        with db._get_connection() as conn:
-                            conn.execute("UPDATE activities SET grade_section=? WHERE student_id=? AND title=?", 
-                                         (st.session_state.event_grade_context, st.session_state.user, st.session_state.pending_project['title']))
+                                         st.session_state.pending_project['skills'], path,
+                                         grade_section=st.session_state.event_grade_context, thumbnails=thumbs)
                         
                         st.session_state.update({'interview_complete': False, 'chat_history': [], 'interview_counter': -1})
                         st.rerun()
@@ -199,11 +195,9 @@ else:
                 m_desc = st.text_area("Summary of Event")
                 m_img = st.file_uploader("Evidence Image", type=['jpg','png','jpeg'])
                 if st.form_submit_button("Add Manually"):
-                    path = pf_manager.save_evidence(st.session_state.user, m_img) if m_img else None
-                    db.save_activity(st.session_state.user, m_title, m_desc, m_skills, path)
-                    with db._get_connection() as conn:
-                        conn.execute("UPDATE activities SET grade_section=? WHERE student_id=? AND title=?", 
-                                     (m_grade, st.session_state.user, m_title))
+                    path, thumbs = pf_manager.save_evidence(st.session_state.user, m_img) if m_img else (None, None)
+                    db.save_activity(st.session_state.user, m_title, m_desc, m_skills, path, grade_section=m_grade,
+                                     thumbnails=thumbs)
                     st.rerun()
 
         with c_list:
@@ -217,7 +211,7 @@ else:
                         if row['file_path']: st.image(row['file_path'], use_container_width=True)
                         st.write(row['summary'])
                         if st.button("🗑️ Delete", key=f"std_del_{idx}"):
-                            db.delete_activity(st.session_state.user, row['title'], row['date'])
+                            db.delete_activity(int(row['id']), sid=st.session_state.user)
                             st.rerun()
 
     # --- TAB 3: CAREER MENTOR CHATBOT ---
@@ -0,0 +1,99 @@
+"""
+Identical evidence photos are stored once and reference-counted: a file and its
+thumbnails go away only when the last activity using them is deleted.
+"""
+import io
+import os
+import pytest
+from PIL import Image
+from database import DatabaseManager
+from image_pipeline import THUMBNAIL_SIZES, thumbnail_path
+from portfolio_manager import PortfolioManager
+
+
+def photo(name="proof.png", color=(200, 40, 40)):
+    buf = io.BytesIO()
+    Image.new("RGB", (320, 240), color).save(buf, format="PNG")
+    buf.seek(0)
+    buf.name = name
+    return buf
+
+
+def stored_files(path):
+    return [path] + [thumbnail_path(path, px) for px in THUMBNAIL_SIZES.values()]
+
+
+@pytest.fixture
+def db(tmp_path):
+    return DatabaseManager(str(tmp_path / "school.db"))
+
+
+@pytest.fixture
+def store(db, tmp_path):
+    return PortfolioManager(str(tmp_path / "evidence"), db=db)
+
+
+def save(db, store, sid, upload):
+    path, thumbs = store.save_evidence(sid, upload)
+    return db.save_activity(sid, "Robotics Fair", "Built a robot.", "Arduino", path, thumbnails=thumbs), path
+
+
+def test_identical_uploads_share_one_file(db, store):
+    _, first = save(db, store, "S001", photo("a.png"))
+    _, second = save(db, store, "S002", photo("b.png"))
+    assert first == second
+    assert all(os.path.exists(p) for p in stored_files(first))
+    stats = db.get_storage_stats()
+    assert (stats['objects'], stats['references']) == (1, 2)
+    assert stats['saved_bytes'] == os.path.getsize(first)
+
+
+def test_different_content_is_stored_separately(db, store):
+    _, first = save(db, store, "S001", photo())
+    _, second = save(db, store, "S001", photo(color=(0, 0, 255)))
+    assert first != second
+    assert db.get_storage_stats()['objects'] == 2
+
+
+def test_file_outlives_all_but_the_last_reference(db, store):
+    a, path = save(db, store, "S001", photo())
+    b, _ = save(db, store, "S002", photo())
+    db.delete_activity(a)
+    assert all(os.path.exists(p) for p in stored_files(path))
+    db.delete_activity(b, sid="S002")
+    assert not any(os.path.exists(p) for p in stored_files(path))
+    assert db.get_storage_stats()['objects'] == 0
+
+
+def test_delete_user_releases_their_references(db, store):
+    db.create_user("S001", "Ada", "pw")
+    save(db, store, "S001", photo())
+    _, path = save(db, store, "S001", photo())
+    db.delete_user("S001")
+    assert not os.path.exists(path)
+    assert db.get_storage_stats()['references'] == 0
+
+
+def test_reupload_after_cleanup_stores_the_file_again(db, store):
+    a, path = save(db, store, "S001", photo())
+    db.delete_activity(a)
+    _, again = save(db, store, "S002", photo())
+    assert again == path and os.path.exists(path)
+    assert db.get_storage_stats()['references'] == 1
+
+
+def test_save_fails_cleanly_when_the_file_is_gone(db, store):
+    path, thumbs = store.save_evidence("S001", photo())
+    os.remove(path)
+    with pytest.raises(FileNotFoundError):
+        db.save_activity("S001", "Robotics Fair", "Built a robot.", "Arduino", path, thumbnails=thumbs)
+    assert db.get_student_profile("S001")[1].empty
+    assert db.get_storage_stats()['objects'] == 0
+
+
+def test_evidence_columns_are_not_editable(db, store):
+    activity, _ = save(db, store, "S001", photo())
+    with pytest.raises(ValueError):
+        db.update_activity(activity, file_path="elsewhere.png")
+    with pytest.raises(ValueError):
+        db.update_activity(activity, thumb_small=None)
@@ -0,0 +1,66 @@
+"""
+After a grade write the cohort report reloads only the students written since; it
+must come out identical to a report built from a full reload.
+"""
+import pandas as pd
+import pytest
+from database import DatabaseManager
+from grade_analytics import CohortAnalytics, build_report, load_grades
+
+STUDENTS = [f"S{i:03d}" for i in range(12)]
+SUBJECTS = ["Biology", "English", "Mathematics"]
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(str(tmp_path / "school.db"))
+    rows = [(sid, year, term, subject, (i * 7 + year + len(term) * j) % 101)
+            for i, sid in enumerate(STUDENTS) for year in (2024, 2025)
+            for term in ("Term 1", "Term 2") for j, subject in enumerate(SUBJECTS)]
+    with db._get_connection() as conn:
+        conn.executemany("INSERT INTO users (student_id, password, role, name) VALUES (?, '', 'Student', ?)",
+                         [(sid, sid) for sid in STUDENTS])
+        conn.executemany("INSERT INTO grades VALUES (?,?,?,?,?)", rows)
+        conn.commit()
+    return db
+
+
+def assert_same_report(report, expected):
+    assert report.keys() == expected.keys()
+    for key, value in expected.items():
+        if isinstance(value, pd.DataFrame):
+            pd.testing.assert_frame_equal(report[key], value)
+        else:
+            assert report[key] == value, key
+
+
+def test_load_reads_every_mark(db):
+    g = load_grades(db)
+    assert len(g) == len(STUDENTS) * 2 * 2 * len(SUBJECTS)
+    assert list(g['subject'].cat.categories) == SUBJECTS
+    assert list(g['term'].cat.categories[:2]) == ["Term 1", "Term 2"]
+    assert g['period_no'].nunique() == 4
+
+
+@pytest.mark.parametrize("write", [
+    lambda db: db.update_grade("S003", 2025, "Term 2", "Mathematics", 12),
+    lambda db: db.update_grade("S004", 2026, "Term 1", "Chemistry", 88),
+    lambda db: db.update_grade("S005", 2025, "Summer", "English", 71),
+    lambda db: db.delete_user("S000"),
+    lambda db: db.bulk_upsert_grades(pd.DataFrame({
+        'student_id': STUDENTS[:3], 'year': 2026, 'term': "Term 1", 'subject': "Art", 'mark': [40, 55, 90]})),
+])
+def test_incremental_rebuild_matches_a_full_reload(db, write):
+    analytics = CohortAnalytics(db)
+    analytics.report()
+    write(db)
+    report, _ = analytics.report()
+    assert_same_report(report, build_report(load_grades(db)))
+
+
+def test_change_log_falls_back_to_a_full_reload(db):
+    assert db.grades_changed_since(db.grades_version) == set()
+    db.update_grade("S001", 2025, "Term 1", "Biology", 60)
+    assert db.grades_changed_since(db.grades_version - 1) == {"S001"}
+    db._grade_changes.clear()
+    assert db.grades_changed_since(db.grades_version - 1) is None
@@ -0,0 +1,90 @@
+"""
+A cohort insight run must count every per-student failure, stop promptly when the
+caller interrupts it, and share prompt, cache entry and stored row with the
+single-student button.
+"""
+import sqlite3
+import time
+import pytest
+from ai_interviewer import EvidenceInterviewer
+from database import DatabaseManager
+from fake_llm import FakeBackend
+from insight_batch import InsightBatchJob
+from llm_cache import LLMResponseCache
+
+STUDENTS = [f"S{i:03d}" for i in range(24)]
+
+
+class Interrupted(BaseException):
+    """Stands in for Streamlit's StopException, which is not an Exception either."""
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(str(tmp_path / "school.db"))
+    # Skip create_user's bcrypt round: the passwords are never checked here
+    with db._get_connection() as conn:
+        conn.executemany("INSERT INTO users (student_id, password, role, name) VALUES (?, '', 'Student', ?)",
+                         [(sid, f"Student {sid}") for sid in STUDENTS])
+        conn.commit()
+    for sid in STUDENTS:
+        db.update_grade(sid, 2025, "Term 1", "Mathematics", 70)
+    return db
+
+
+def make_ai(tmp_path=None, **client_kwargs):
+    cache = LLMResponseCache(str(tmp_path / "llm_cache.db")) if tmp_path else None
+    return EvidenceInterviewer([], backend=FakeBackend(keys=1, **client_kwargs), response_cache=cache)
+
+
+def client_calls(ai):
+    return sum(len(c.calls) for c in ai.backend.clients)
+
+
+def test_run_generates_then_skips_unchanged_students(db):
+    job = InsightBatchJob(db, make_ai())
+    assert job.run()['processed'] == len(STUDENTS)
+    report = job.run()
+    assert (report['processed'], report['skipped']) == (0, len(STUDENTS))
+    assert len(db.get_student_insights()) == len(STUDENTS)
+
+
+def test_other_errors_count_as_failed(db, monkeypatch):
+    save = db.save_student_insight
+
+    def flaky_save(sid, sections, fingerprint):
+        if sid == STUDENTS[3]:
+            raise sqlite3.OperationalError("database is locked")
+        save(sid, sections, fingerprint)
+
+    monkeypatch.setattr(db, "save_student_insight", flaky_save)
+    report = InsightBatchJob(db, make_ai()).run()
+    assert (report['processed'], report['failed']) == (len(STUDENTS) - 1, 1)
+
+
+def test_interrupted_run_returns_without_waiting_for_the_cohort(db):
+    job = InsightBatchJob(db, make_ai(latency=0.1), workers=2)
+
+    def progress(done, total, sid):
+        if done:
+            raise Interrupted
+
+    started = time.monotonic()
+    with pytest.raises(Interrupted):
+        job.run(progress=progress)
+    # The whole cohort would take 24 * 0.1 / 2 = 1.2s
+    assert time.monotonic() - started < 0.6
+    time.sleep(0.3)
+    assert len(db.get_student_insights()) <= 2 * job.workers
+
+
+def test_single_student_insight_shares_the_batch_cache_entry(db, tmp_path):
+    ai = make_ai(tmp_path)
+    job = InsightBatchJob(db, ai)
+    text = job.generate(STUDENTS[0])
+    assert "FUTURE PERSPECTIVE" in text
+    assert STUDENTS[0] in set(db.get_student_insights()['student_id'])
+
+    report = job.run(force=True)
+    assert report['processed'] == len(STUDENTS)
+    assert client_calls(ai) == len(STUDENTS)
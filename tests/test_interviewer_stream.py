@@ -0,0 +1,43 @@
+"""
+The Journalist reply is streamed in chunks and SAVE_DATA is parsed from the joined
+text, so the tag must survive chunking and a truncated or missing tag must not save.
+"""
+import pytest
+from ai_interviewer import EvidenceInterviewer
+from fake_llm import FakeStreamingClient, QUESTION_REPLY
+
+HISTORY = [{"role": "user", "content": "I built a line-following robot for the science fair."}]
+
+
+def streamed(reply=None, counter=5, chunk_size=5):
+    ai = EvidenceInterviewer([], client=FakeStreamingClient(reply=reply, chunk_size=chunk_size))
+    chunks = list(ai.stream_ai_response(HISTORY[-1]["content"], HISTORY, counter))
+    return chunks, "".join(chunks)
+
+
+def test_final_round_tag_survives_chunking():
+    chunks, reply = streamed()
+    # The tag is split across several chunks
+    assert not any("SAVE_DATA" in c for c in chunks)
+    assert EvidenceInterviewer.extract_save_data(reply) == {
+        "title": "Line-Following Robot",
+        "skills": "Arduino, C++, Teamwork",
+        "summary": "Designed and programmed a line-following robot that placed second at the regional science fair.",
+    }
+
+
+def test_question_rounds_carry_no_tag():
+    _, reply = streamed(counter=2)
+    assert reply == QUESTION_REPLY
+    assert EvidenceInterviewer.extract_save_data(reply) is None
+
+
+@pytest.mark.parametrize("reply", [
+    "Robot summary.\n\nSAVE_DATA: Grade 10 | Line-Following Robot",
+    "Robot summary.\n\nSAVE_DATA:",
+    "Robot summary without a tag.",
+])
+def test_partial_or_missing_tag_returns_none(reply):
+    _, text = streamed(reply)
+    assert text == reply
+    assert EvidenceInterviewer.extract_save_data(text) is None
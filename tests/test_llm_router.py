@@ -0,0 +1,68 @@
+"""
+A degraded provider (timeouts, dropped connections) must count against its health and
+fail over to the next backend instead of surfacing as a raw transport error.
+"""
+from types import SimpleNamespace
+import httpx
+import pytest
+from fake_llm import FakeBackend, MENTOR_REPLY
+from groq_pool import LLMUnavailableError
+from llm_backends import GeminiBackend
+from llm_router import LLMRouter
+
+MESSAGES = [{"role": "user", "content": "What should I study next?"}]
+
+
+class UnreachableGemini:
+    """A google-genai client whose every call fails before reaching the API."""
+
+    def __init__(self):
+        self.models = SimpleNamespace(generate_content=self._fail, generate_content_stream=self._fail)
+
+    @staticmethod
+    def _fail(**kwargs):
+        raise httpx.ConnectError("connection refused")
+
+
+@pytest.fixture
+def gemini():
+    return GeminiBackend("unused", client=UnreachableGemini())
+
+
+def test_gemini_wraps_transport_errors(gemini):
+    with pytest.raises(LLMUnavailableError):
+        gemini.complete(MESSAGES)
+    with pytest.raises(LLMUnavailableError):
+        list(gemini.stream(MESSAGES))
+    assert gemini.errors == 2
+
+
+@pytest.mark.parametrize("hedge", [True, False])
+def test_complete_fails_over_and_records_the_failure(gemini, hedge):
+    router = LLMRouter([gemini, FakeBackend(keys=1)], hedge=hedge)
+    assert router.complete(MESSAGES) == MENTOR_REPLY
+    stats = {s['provider']: s for s in router.stats()}
+    assert stats[gemini.model_id]['error_rate'] == 1.0
+    assert stats[gemini.model_id]['wins'] == 0
+
+
+def test_stream_fails_over_before_the_first_chunk(gemini):
+    router = LLMRouter([gemini, FakeBackend(keys=1)])
+    assert "".join(router.stream(MESSAGES)) == MENTOR_REPLY
+    assert router.stats()[0]['error_rate'] == 1.0
+
+
+def test_failing_provider_is_ranked_last(gemini):
+    router = LLMRouter([gemini, FakeBackend(keys=1)], hedge=False)
+    for _ in range(3):
+        router.complete(MESSAGES)
+    # After its first failure Gemini is tried only once Groq has failed too
+    assert {s['provider']: s for s in router.stats()}[gemini.model_id]['requests'] == 1
+
+
+def test_all_providers_down_raises_unavailable(gemini):
+    router = LLMRouter([gemini, GeminiBackend("unused", model_id="backup", client=UnreachableGemini())])
+    with pytest.raises(LLMUnavailableError):
+        router.complete(MESSAGES)
+    with pytest.raises(LLMUnavailableError):
+        list(router.stream(MESSAGES))
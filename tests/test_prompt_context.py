@@ -0,0 +1,90 @@
+"""
+The compact context must keep the facts the model needs (latest marks, trends, top
+skills, newest projects) even when a long history is squeezed into a small budget.
+"""
+import pandas as pd
+import pytest
+from prompt_context import build_student_context, context_report, estimate_tokens
+
+YEARS = range(2019, 2026)
+TERMS = ["Term 1", "Term 2", "Term 3", "Term 4"]
+SUBJECTS = ["Biology", "Chemistry", "English", "History", "Mathematics", "Physics"]
+BUDGET = 300
+
+
+@pytest.fixture
+def grades():
+    rows = []
+    for y, year in enumerate(YEARS):
+        for t, term in enumerate(TERMS):
+            step = y * len(TERMS) + t
+            for s, subject in enumerate(SUBJECTS):
+                if subject == "Mathematics":
+                    mark = 40 + step          # steadily improving
+                elif subject == "History":
+                    mark = 90 - step          # steadily declining
+                else:
+                    mark = 60 + s
+                rows.append(("S001", year, term, subject, mark))
+    return pd.DataFrame(rows, columns=['student_id', 'year', 'term', 'subject', 'mark'])
+
+
+@pytest.fixture
+def activities():
+    rows = []
+    for i in range(40):
+        skills = "Leadership, Teamwork" if i % 2 else f"Leadership, Skill {i}"
+        rows.append((i, "S001", f"Project {i:02d}", "Built and presented a thing. " * 10, skills,
+                     f"2024-{1 + i // 4:02d}-{1 + i % 4 * 7:02d}", f"/uploads/project_{i}.png",
+                     "approved" if i % 3 else "pending"))
+    return pd.DataFrame(rows, columns=['id', 'student_id', 'title', 'summary', 'skills', 'date', 'file_path',
+                                       'status'])
+
+
+def test_fits_budget_and_is_far_smaller_than_raw_dump(grades, activities):
+    context = build_student_context(grades, activities, max_tokens=BUDGET)
+    assert estimate_tokens(context) <= BUDGET
+    report = context_report(grades, activities, max_tokens=BUDGET)
+    assert report['reduction'] > 0.9
+
+
+def test_keeps_latest_mark_of_every_subject(grades, activities):
+    context = build_student_context(grades, activities, max_tokens=BUDGET)
+    latest = grades[(grades['year'] == max(YEARS)) & (grades['term'] == TERMS[-1])]
+    for subject, mark in zip(latest['subject'], latest['mark']):
+        assert f"- {subject}: latest {mark} ({max(YEARS)} {TERMS[-1]})" in context
+
+
+def test_keeps_trends(grades, activities):
+    context = build_student_context(grades, activities, max_tokens=BUDGET)
+    terms = len(YEARS) * len(TERMS)
+    assert f"Mathematics: latest {40 + terms - 1}" in context
+    assert f"trend up {terms - 1} over {terms} terms" in context
+    assert f"trend down {terms - 1} over {terms} terms" in context
+    assert "Biology" in context and "trend steady" in context
+
+
+def test_keeps_top_skills(grades, activities):
+    context = build_student_context(grades, activities, max_tokens=BUDGET)
+    skills = context.split("SKILLS:\n")[1].split("\n")[0]
+    assert skills.startswith("Leadership (x40), Teamwork (x20)")
+
+
+def test_keeps_newest_projects_and_counts_the_rest(grades, activities):
+    context = build_student_context(grades, activities, max_tokens=BUDGET)
+    projects = context.split("PROJECTS (40 total, newest first):\n")[1]
+    assert projects.startswith("- 2024-10-22 Project 39 [pending]:")
+    assert "Project 00" not in projects
+    assert "more projects omitted)" in projects
+
+
+def test_only_unapproved_projects_are_tagged(grades, activities):
+    context = build_student_context(grades, activities, max_tokens=2000)
+    assert "[approved]" not in context
+    assert "Project 39 [pending]:" in context
+    assert "Project 38:" in context
+
+
+def test_empty_profile():
+    context = build_student_context(pd.DataFrame(columns=['year', 'term', 'subject', 'mark']), pd.DataFrame())
+    assert context.count("- none recorded") == 4